@@ -32,6 +32,8 @@ class Frontier(object):
     def __init__(self):
         """ initialize the Frontier"""
         self._nodes = []
+        # the number of Nodes discarded instead of kept: repeated states, or Nodes past a limit
+        self.pruned = 0
 
     def __len__(self):
         """ the length of the Frontier is the length of the list attribute"""
@@ -86,6 +88,7 @@ class GFrontierFIFO(FrontierFIFO):
         while anc is not None:
             if anc.state == aNode.state:
                 # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
                 return
             anc = anc.parent
         # no parent state is the same, so no loop
@@ -129,6 +132,7 @@ class GFrontierLIFO(FrontierLIFO):
         while anc is not None:
             if anc.state == aNode.state:
                 # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
                 return
             anc = anc.parent
         # no parent state is the same, so no loop
@@ -153,7 +157,8 @@ class FrontierLIFO_DL(FrontierLIFO):
         """add the new state on the end"""
         if aNode.depth <= self.__dlimit:
             self._nodes.append(aNode)
-        elif not self._cutoff:
+        else:
+            self.pruned += 1
             self._cutoff = True
 
 
@@ -178,6 +183,7 @@ class GFrontierLIFO_DL(FrontierLIFO_DL):
         while anc is not None:
             if anc.state == aNode.state:
                 # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
                 return
             anc = anc.parent
         # no parent state is the same, so no loop
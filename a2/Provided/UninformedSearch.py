@@ -14,6 +14,7 @@
 # This module defines the classes:
 #     SearchNode (inherits from Python object class)
 #     SearchTerminationRecord (inherits from Python object class)
+#     SearchStats (inherits from Python object class)
 #     Search (inherits from Python object class)
 
 # Assumes a problem class with the methods:
@@ -40,6 +41,10 @@
 #   or public access to any of the data stored in the result.
 
 # ALL SEARCH IS SUBJECT TO A TIME LIMIT.
+#
+# Search(pi, <timelimit>, instrument=True) counts and times the parts of each search
+# (see SearchStats); the breakdown is in result.stats.  It is off by default,
+# and then the search loop calls the Problem and Frontier methods directly.
 
 import time as time
 import Frontier as Frontiers
@@ -91,13 +96,14 @@ class SearchTerminationRecord(object):
        at different parts of the code.
     """
 
-    def __init__(self, success=False, result=None, time=0, nodes=0, space=0, cutoff=False):
+    def __init__(self, success=False, result=None, time=0, nodes=0, space=0, cutoff=False, stats=None):
         self.success = success  # Boolean: True if a solution was found
         self.result = result    # SearchNode: a node containing a goal state, or None if no solution found
         self.time = time        # float: time was spent searching.  Not scientifically accurate, but good enough for fun
         self.nodes = nodes      # integer: number of nodes expanded during the search
         self.space = space      # integer: maximum size of the frontier during search
         self.cutoff = cutoff    # Boolean: For IDS, True if depth limited search reach the depth limit before failing
+        self.stats = stats      # SearchStats: a breakdown of the search, if it was instrumented; else None
 
     def __str__(self):
         """Create a string representation of the Result data
@@ -111,20 +117,68 @@ class SearchTerminationRecord(object):
         return text.format(textsuccess, str(self.time), str(self.nodes), str(self.space))
 
 
+class SearchStats(object):
+    """Counts and timings from an instrumented search; see Search(..., instrument=True).
+       Times are in seconds.
+    """
+
+    def __init__(self):
+        self.goal_tests = 0         # integer: States tested with is_goal()
+        self.expanded = 0           # integer: Nodes whose children were generated
+        self.generated = 0          # integer: child States created
+        self.adds = 0               # integer: calls to Frontier.add()
+        self.removes = 0            # integer: calls to Frontier.remove()
+        self.pruned = 0             # integer: Nodes the Frontier discarded (see Frontier.pruned)
+        self.result_time = 0.0      # float: time in result()
+        self.add_time = 0.0         # float: time in Frontier.add()
+        self.remove_time = 0.0      # float: time in Frontier.remove()
+
+    def add(self, other):
+        """Add the counts and times from another SearchStats, e.g., for another iteration of IDS"""
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def __str__(self):
+        """Create a string representation, one line per count or time"""
+        return '\n'.join('{}: {}'.format(name, value) for name, value in vars(self).items())
+
+
+def _timed(function, stats, count_name, time_name):
+    """Return a version of function that counts its calls, and adds up the time they take, in stats.
+       :param count_name: the SearchStats attribute to count the calls in
+       :param time_name: the SearchStats attribute to add the time to, or None to only count
+    """
+    clock = time.perf_counter
+
+    def timed(*args):
+        setattr(stats, count_name, getattr(stats, count_name) + 1)
+        if time_name is None:
+            return function(*args)
+        start = clock()
+        try:
+            return function(*args)
+        finally:
+            setattr(stats, time_name, getattr(stats, time_name) + clock() - start)
+
+    return timed
+
+
 class Search(object):
     """A class to contain uninformed search algorithms.
        API users should call the public methods.
        Subclasses inheriting this class can call _treeSearch() or _dltree_search()
     """
 
-    def __init__(self, problem, timelimit=10):
+    def __init__(self, problem, timelimit=10, instrument=False):
         """The Search object needs to be given:
             the search Problem
             an optional timelime (default set above)
+            optionally, instrument=True to count and time the parts of each search (see SearchStats)
         """
         self._problem = problem
         self._frontier = None
         self._time_limit = timelimit
+        self._instrument = instrument
 
 
     def _tree_search(self, initial_state):
@@ -134,36 +188,61 @@ class Search(object):
                 time so as not to exceed a time limit.
                 number of nodes expanded
                 size of the frontier at any point
+           With instrument=True, the search also counts and times its parts, and the
+           record's stats attribute holds the SearchStats.
         """
+        problem = self._problem
+        frontier = self._frontier
+
+        # the loop calls these; with instrument=True, they are replaced by timed versions
+        is_goal = problem.is_goal
+        result = problem.result
+        add = frontier.add
+        remove = frontier.remove
+        stats = None
+        if self._instrument:
+            stats = SearchStats()
+            is_goal = _timed(is_goal, stats, 'goal_tests', None)
+            result = _timed(result, stats, 'generated', 'result_time')
+            add = _timed(add, stats, 'adds', 'add_time')
+            remove = _timed(remove, stats, 'removes', 'remove_time')
+            pruned = frontier.pruned
 
         start_time = time.time()
         now = start_time
-        self._frontier.add(SearchNode(initial_state, None))
+        add(SearchNode(initial_state, None))
         node_counter = 0
         max_space = 0
+        success = False
+        this_node = None
 
         # keep searching if there are nodes in the Frontier, and time left before the limit
-        while not self._frontier.is_empty() and now - start_time < self._time_limit:
-            max_space = max(max_space, len(self._frontier))
-            this_node = self._frontier.remove()
+        while not frontier.is_empty() and now - start_time < self._time_limit:
+            max_space = max(max_space, len(frontier))
+            this_node = remove()
             node_counter += 1
             now = time.time()
-            if self._problem.is_goal(this_node.state):
-                # Jeffnote, 2020-07-28: I started getting division-by-zero with time - was the search too fast?
-
-                return SearchTerminationRecord(success=True, result=this_node,
-                                    nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+            if is_goal(this_node.state):
+                success = True
+                break
             else:
-                for act in self._problem.actions(this_node.state):
-                    child = self._problem.result(this_node.state, act)
-                    self._frontier.add(SearchNode(child, this_node))
+                for act in problem.actions(this_node.state):
+                    child = result(this_node.state, act)
+                    add(SearchNode(child, this_node))
+        else:
+            # didn't find a solution!
+            now = time.time()
+            this_node = None
 
-        # didn't find a solution!
-        now = time.time()
-        # Jeffnote, 2020-07-28: I started getting division-by-zero with time - was the search too fast?
+        if stats is not None:
+            # every node tested but the goal was expanded
+            stats.expanded = stats.goal_tests - success
+            stats.pruned = frontier.pruned - pruned
 
-        return SearchTerminationRecord(success=False, result=None,
-                            nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+        # Jeffnote, 2020-07-28: I started getting division-by-zero with time - was the search too fast?
+        return SearchTerminationRecord(success=success, result=this_node,
+                            nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001),
+                            stats=stats)
 
 
     def DepthFirstSearch(self, initial_state, search_type):
@@ -242,21 +321,27 @@ class Search(object):
         nodes = 0
         time = 0
         space = 0
+        # with instrument=True, the stats of all the iterations are added up
+        stats = SearchStats() if self._instrument else None
         while time < self._time_limit:
             answer = self.DepthLimitedSearch(initial_state, limit, search_type)
+            if stats is not None:
+                stats.add(answer.stats)
             if answer.success:
                 answer.time += time
                 answer.nodes += nodes
                 answer.space = max(answer.space, space)
+                answer.stats = stats
                 return answer
             elif not self._frontier._cutoff:
-                return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time)
+                return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time,
+                                               stats=stats)
             else:
                 nodes += answer.nodes
                 time += answer.time    # this could result in search that is substantial longer than the limit
                 limit += 1
                 space = max(answer.space, space)
 
-        return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time)
+        return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time, stats=stats)
 
 # end of file
@@ -7,10 +7,15 @@
 # IDS and displays the sequence of actions needed to 
 # solve each problem
 #
+# usage: python see_solutions.py problem_file time_limit [--cache FILE]
+#   With --cache FILE, solutions are kept in FILE (see solutioncache.py),
+#   and a problem already solved is not searched again.
 
 
 import UninformedSearch as BlindSearch
 import coloredTiles as P
+import puzzlefile
+import solutioncache
 
 import sys as sys
 import time as time
@@ -18,39 +23,42 @@ import time as time
 # process the command line arguments
 #print(sys.argv)
 
-if len(sys.argv) < 2:
-    print('usage: python', sys.argv[0], 'problem_file time_limit')
-    sys.exit()
-
-
-timelimit = int(sys.argv[2])
-
-file = open(sys.argv[1], 'r')
+args = sys.argv[1:]
+cache = None
+if '--cache' in args:
+    i = args.index('--cache')
+    cache = solutioncache.SolutionCache(args[i+1])
+    del args[i:i+2]
 
-# read the examples first
-examples = []
-file = open(sys.argv[1], 'r')
-line = file.readline()
+if len(args) < 2:
+    print('usage: python', sys.argv[0], 'problem_file time_limit [--cache FILE]')
+    sys.exit()
 
-while line:
-    #read the puzzle dimension
-    dims = int(line)
-    puzzle = []
-    for i in range(dims):
-        line = file.readline().rstrip()
-        puzzle.append(line)
-    examples.append(puzzle)
-    line = file.readline()
 
-file.close()
+timelimit = int(args[1])
 
 # search using IDS and graph search
 search_type = "graph"
 problem_index = 1
 
-for ex in examples:
+# the name of this strategy in the cache
+strategy = "IDS-" + search_type
+
+for ex in puzzlefile.read_puzzles(args[0]):
     problem = P.Problem(len(ex), len(ex[0]), ex)
     s = problem.create_initial_state()
+    cached = cache.lookup(ex, strategy, timelimit) if cache is not None else None
+    if cached is not None:
+        if cached.success:
+            print(cached.depth, "actions needed to solve problem",problem_index, "(cached)")
+            s.display()
+            cached.display_steps()
+        else:
+            print("Could not solve problem", problem_index, "(cached)")
+        problem_index += 1
+        print("----------------")
+        continue
+
     searcher = BlindSearch.Search(problem, timelimit=timelimit)
     answer = searcher.IDS(s, search_type)
     if answer.success:
@@ -58,10 +66,17 @@ for ex in examples:
         s.display()
         # NOTE: Your state class needs to store the action that created it using a class variable called "action" in order to use this!
         answer.result.display_steps()
+        actions = solutioncache.actions_of(answer.result)
     else:
         print("Could not solve problem", problem_index)
+        actions = None
+    if cache is not None:
+        cache.store(ex, strategy, timelimit, answer.success, actions, answer.time, answer.nodes, answer.space)
     problem_index += 1
     print("----------------")
 
+if cache is not None:
+    cache.close()
+
 
 
@@ -1,19 +1,13 @@
 
 import sys as sys
 import coloredTiles as P
+import puzzlefile
 
-file = open(sys.argv[1], 'r')
-line = file.readline()
 puzzles = []
-while line:
+for puzzle in puzzlefile.read_puzzles(sys.argv[1]):
     #read the puzzle dimension
-    print(line)
-    dims = int(line)
-    puzzle = []
-    for i in range(dims):
-        line = file.readline().rstrip()
-        puzzle.append(line)
-    line = file.readline()
+    dims = len(puzzle)
+    print(dims)
     p = P.Problem(dims, dims, puzzle)
     print(p.init_state)
     print(p.goal_state)
@@ -0,0 +1,191 @@
+# CMPT 317: An exact solver for the Colored Tiles problem, using linear algebra over GF(2).
+
+# This module defines the classes:
+#     ToggleSystem (inherits from Python object class)
+#     AlgebraicSearch (inherits from UninformedSearch.Search)
+#
+# Touching a tile twice undoes the first touch, and the order of the touches does not
+# matter.  So a solution is just a set of tiles to touch, and whether a tile ends up
+# flipped depends only on the parity of the touches around it.  That makes the whole
+# puzzle a system of linear equations modulo 2:
+#     A x = b
+# where b has a 1 for each red tile, x has a 1 for each tile to touch, and A[i][j] is 1
+# when touching tile j flips tile i.
+#
+# Gaussian elimination on A depends only on the grid size, so it is done once per
+# (nrows, ncols) and cached.  Solving one puzzle is then a handful of bit operations.
+# When A is singular, every solution is the particular solution plus some combination
+# of the null space basis vectors; we try them all and keep the one with the fewest
+# touches, which is an optimal solution.
+#
+# Rows and columns of A, and the vectors x and b, are stored as Python ints, using
+# the same bit layout as coloredTiles.BitState: bit (r*ncols + c) is tile (r, c).
+#
+# Usage:
+#   import AlgebraicSearch as Search
+#   pi = <create a Colored Tiles problem instance>
+#   searcher = Search.AlgebraicSearch(pi, <timelimit>)
+#   s = pi.create_initial_state()
+#   result = searcher.GaussianElimination(s)
+#   print(str(result))
+
+import time as time
+import coloredTiles as P
+import UninformedSearch as BlindSearch
+
+
+class ToggleSystem(object):
+    """The eliminated toggle matrix for one grid size.
+       Use toggle_system() to get one, so that the elimination is only done once per size.
+    """
+
+    def __init__(self, nrows, ncols):
+        """Perform Gauss-Jordan elimination on the toggle matrix for the given grid size.
+           Each row is kept together with the combination of original rows that produced it,
+           so that the same row operations can be applied to any right-hand side later.
+        """
+        self.nrows = nrows
+        self.ncols = ncols
+        n = nrows * ncols
+        masks = P.touch_masks(nrows, ncols)
+        # row i of A: which touches flip tile i.  The matrix is symmetric, so this is the touch mask.
+        rows = [masks[i] for i in range(n)]
+        combos = [1 << i for i in range(n)]
+
+        pivots = []
+        free = []
+        rank = 0
+        for col in range(n):
+            bit = 1 << col
+            p = rank
+            while p < n and not rows[p] & bit:
+                p += 1
+            if p == n:
+                free.append(col)
+                continue
+            rows[rank], rows[p] = rows[p], rows[rank]
+            combos[rank], combos[p] = combos[p], combos[rank]
+            for i in range(n):
+                if i != rank and rows[i] & bit:
+                    rows[i] ^= rows[rank]
+                    combos[i] ^= combos[rank]
+            pivots.append(col)
+            rank += 1
+
+        self.rank = rank
+        # (pivot column, row combination) for each non-zero row of the reduced matrix
+        self._pivot_rows = [(pivots[k], combos[k]) for k in range(rank)]
+        # the zero rows: b must have even parity on each of these, or there is no solution
+        self._checks = combos[rank:]
+        # one null space basis vector per free column
+        self.null_space = []
+        for f in free:
+            v = 1 << f
+            for k in range(rank):
+                if rows[k] >> f & 1:
+                    v |= 1 << pivots[k]
+            self.null_space.append(v)
+
+    def is_solvable(self, bits):
+        """Return True if the packed grid can be turned all green."""
+        for check in self._checks:
+            if (check & bits).bit_count() & 1:
+                return False
+        return True
+
+    def particular_solution(self, bits):
+        """Return some set of touches (packed) that solves the packed grid,
+           or None if there is no solution.
+        """
+        if not self.is_solvable(bits):
+            return None
+        x = 0
+        for col, combo in self._pivot_rows:
+            if (combo & bits).bit_count() & 1:
+                x |= 1 << col
+        return x
+
+    def solve(self, bits, deadline=None):
+        """Return a minimum set of touches (packed) that solves the packed grid,
+           or None if there is no solution.
+           :param bits: the packed grid
+           :param deadline: optional time.time() value; the null space search stops early at this time
+           :return: a tuple (touches, candidates, complete), where candidates is the number of
+                    solutions examined, and complete is False if the deadline cut the search short.
+        """
+        x = self.particular_solution(bits)
+        if x is None:
+            return None, 0, True
+        best = x
+        best_count = x.bit_count()
+        # walk the null space in Gray code order, so each step is a single XOR
+        candidates = 1
+        for i in range(1, 1 << len(self.null_space)):
+            x ^= self.null_space[(i & -i).bit_length() - 1]
+            candidates += 1
+            count = x.bit_count()
+            if count < best_count:
+                best = x
+                best_count = count
+            if deadline is not None and i & 1023 == 0 and time.time() > deadline:
+                return best, candidates, False
+        return best, candidates, True
+
+
+_system_cache = {}
+
+def toggle_system(nrows, ncols):
+    """Return the ToggleSystem for the given grid size, building it the first time."""
+    key = (nrows, ncols)
+    if key not in _system_cache:
+        _system_cache[key] = ToggleSystem(nrows, ncols)
+    return _system_cache[key]
+
+
+class AlgebraicSearch(BlindSearch.Search):
+    """A class to contain the exact linear algebra solver.
+       It returns the same SearchTerminationRecord as the other Search classes.
+    """
+
+    def __init__(self, problem, timelimit=10):
+        """The Search object needs to be given:
+            the search Problem
+            an optional timelime (default set above)
+        """
+        BlindSearch.Search.__init__(self, problem, timelimit=timelimit)
+
+    def GaussianElimination(self, initial_state):
+        """
+        Solve the problem by Gaussian elimination over GF(2), starting at a given initial state.
+        The solution found uses the fewest possible touches.
+        The record's nodes attribute counts the candidate solutions examined,
+        and its space attribute is the number of null space basis vectors.
+        If the time limit stops the null space search early, the best solution found
+        so far is returned, and the record's cutoff attribute is True.
+        :param initial_state: a Problem State
+        :return: SearchTerminationRecord
+        """
+        start_time = time.time()
+        nrows = initial_state.nrows
+        ncols = initial_state.ncols
+        system = toggle_system(nrows, ncols)
+        touches, candidates, complete = system.solve(P.pack_puzzle(initial_state.puzzle),
+                                                     start_time + self._time_limit)
+        if touches is None:
+            now = time.time()
+            return BlindSearch.SearchTerminationRecord(success=False, result=None, nodes=candidates,
+                                space=len(system.null_space), time=max(now - start_time, 0.00001))
+
+        # turn the set of touches into a chain of SearchNodes, so display_steps() works
+        node = BlindSearch.SearchNode(initial_state, None)
+        for i in range(nrows * ncols):
+            if touches >> i & 1:
+                child = self._problem.result(node.state, divmod(i, ncols))
+                node = BlindSearch.SearchNode(child, node)
+
+        now = time.time()
+        return BlindSearch.SearchTerminationRecord(success=True, result=node, nodes=candidates,
+                            space=len(system.null_space), time=max(now - start_time, 0.00001),
+                            cutoff=not complete)
+
+# end of file
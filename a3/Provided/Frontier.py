@@ -15,12 +15,20 @@
 #   Frontier: a base class
 #   FrontierFIFO: implements FIFO, for use by BFS
 #   FrontierLIFO: implements LIFO, for use by DFS
+#   GFrontier*: graph search by checking the ancestors of each Node
+#   CFrontier*: graph search using a closed set of states already seen
+#   TranspositionTable and TFrontierLIFO_DL: depth-limited search that remembers states
+#       across the iterations of IDS, in a table of bounded size
 #
 # Assumes a problem class with the methods:
 #   is_goal(problem_state): returns True if the state is the goal state
 #   actions(problem_state): returns a list of all valid actions in state
 #                           (the actions are only passed to result())
 #   result(state, action): returns a new state that is the result of doing action in state.
+# The CFrontier and TFrontier classes also assume the State has a method:
+#   key(): returns a hashable value; two states with the same key are the same state.
+
+import collections as collections
 
 
 class Frontier(object):
@@ -32,6 +40,9 @@ class Frontier(object):
     def __init__(self):
         """ initialize the Frontier"""
         self._nodes = []
+        # the number of Nodes discarded instead of kept: repeated states, Nodes past a limit,
+        # or (in a memory-bounded Frontier) Nodes dropped to make room
+        self.pruned = 0
 
     def __len__(self):
         """ the length of the Frontier is the length of the list attribute"""
@@ -51,17 +62,20 @@ class Frontier(object):
 class FrontierFIFO(Frontier):
     """ This Frontier uses a typical FIFO queue.
         This class inherits the Frontier methods.
+        The queue is a deque rather than a list, so that removing
+        from the front does not shift every other Node.
     """
 
     def __init__(self):
         """ initialize the Frontier"""
         Frontier.__init__(self)
+        self._nodes = collections.deque()
 
     def remove(self):
         """remove a Node from the Frontier"""
         # in a FIFO queue, remove the front Node
-        # this is O(N) --- ouch!
-        val = self._nodes.pop(0)
+        # popleft() on a deque is O(1)
+        val = self._nodes.popleft()
         return val
 
 
@@ -86,6 +100,7 @@ class GFrontierFIFO(FrontierFIFO):
         while anc is not None:
             if anc.state == aNode.state:
                 # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
                 return
             anc = anc.parent
         # no parent state is the same, so no loop
@@ -93,6 +108,31 @@ class GFrontierFIFO(FrontierFIFO):
 
 
 
+class CFrontierFIFO(FrontierFIFO):
+    """ This is a typical FIFO queue, implements graph search.
+        The C stands for Closed set.  Every state that has ever been added
+        is remembered in a set, so each state enters the queue at most once.
+        Because BFS reaches each state first at its shallowest depth,
+        nothing is lost by ignoring it afterwards.
+    """
+
+    def __init__(self):
+        """ initialize the Frontier"""
+        FrontierFIFO.__init__(self)
+        self._closed = set()
+
+    def add(self, aNode):
+        """ Add a Node to the Frontier, unless its state has been seen before.
+            Checking the closed set is O(1), no matter how deep the Node is.
+        """
+        key = aNode.state.key()
+        if key in self._closed:
+            self.pruned += 1
+            return
+        self._closed.add(key)
+        self._nodes.append(aNode)
+
+
 class FrontierLIFO(Frontier):
     """ This Frontier uses a typical LIFO stack.
     This class inherits the Frontier methods.
@@ -129,12 +169,35 @@ class GFrontierLIFO(FrontierLIFO):
         while anc is not None:
             if anc.state == aNode.state:
                 # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
                 return
             anc = anc.parent
         # no parent state is the same, so no loop
         self._nodes.append(aNode)
 
 
+class CFrontierLIFO(FrontierLIFO):
+    """ This version is a LIFO Stack, implements graph search
+        The C stands for Closed set.  Every state that has ever been added
+        is remembered in a set, so each state enters the stack at most once.
+    """
+
+    def __init__(self):
+        """ initialize the Frontier"""
+        FrontierLIFO.__init__(self)
+        self._closed = set()
+
+    def add(self, aNode):
+        """ Add a Node to the Frontier, unless its state has been seen before.
+        """
+        key = aNode.state.key()
+        if key in self._closed:
+            self.pruned += 1
+            return
+        self._closed.add(key)
+        self._nodes.append(aNode)
+
+
 class FrontierLIFO_DL(FrontierLIFO):
     """ This is a LIFO queue, but nodes that exceed a limit are discarded.
     """
@@ -153,7 +216,8 @@ class FrontierLIFO_DL(FrontierLIFO):
         """add the new state on the end"""
         if aNode.depth <= self.__dlimit:
             self._nodes.append(aNode)
-        elif not self._cutoff:
+        else:
+            self.pruned += 1
             self._cutoff = True
 
 
@@ -178,10 +242,103 @@ class GFrontierLIFO_DL(FrontierLIFO_DL):
         while anc is not None:
             if anc.state == aNode.state:
                 # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
                 return
             anc = anc.parent
         # no parent state is the same, so no loop
         super().add(aNode)
 
-# end of file
 
+class CFrontierLIFO_DL(FrontierLIFO_DL):
+    """ This is a LIFO queue, but nodes that exceed a limit are discarded.
+        The C stands for Closed set.  The closed set remembers the shallowest
+        depth at which each state was added.  A state is only added again if it
+        is reached at a shallower depth, because then there is more of the
+        depth limit left to search below it.
+    """
+
+    def __init__(self, dlimit):
+        """ initialize the Frontier"""
+        FrontierLIFO_DL.__init__(self, dlimit)
+        self._closed = {}
+
+    def add(self, aNode):
+        """ Add a Node to the Frontier, unless its state has been seen before
+            at the same depth or shallower.
+        """
+        key = aNode.state.key()
+        depth = self._closed.get(key)
+        if depth is not None and depth <= aNode.depth:
+            self.pruned += 1
+            return
+        self._closed[key] = aNode.depth
+        super().add(aNode)
+
+
+class TranspositionTable(object):
+    """ A table of the states seen by the iterations of IDS, of bounded size.
+        For each state (by State.key()) it records the shallowest depth it was reached at,
+        and the iteration that depth was recorded in.
+        When the table is full, the least recently used state is forgotten.
+        Forgetting a state only means it may be searched again; nothing is lost.
+    """
+
+    def __init__(self, max_size):
+        """ initialize the table
+            max_size: the largest number of states to remember
+        """
+        self._max_size = max_size
+        self._entries = collections.OrderedDict()
+        self.iteration = 0
+
+    def __len__(self):
+        """ the number of states remembered"""
+        return len(self._entries)
+
+    def next_iteration(self):
+        """ Start the next iteration of IDS """
+        self.iteration += 1
+
+    def visit(self, key, depth):
+        """ Record that a state was reached at the given depth.
+            :return: True if it should be searched from there, False if it can be pruned:
+                     it was reached at the same depth or shallower earlier in this iteration,
+                     or strictly shallower in an earlier one (the shallower path comes first,
+                     and will reach it again in this iteration with more of the limit left).
+        """
+        entries = self._entries
+        entry = entries.get(key)
+        if entry is not None:
+            entries.move_to_end(key)
+            seen_depth, seen_iteration = entry
+            if seen_depth < depth or (seen_depth == depth and seen_iteration == self.iteration):
+                return False
+        entries[key] = (depth, self.iteration)
+        if len(entries) > self._max_size:
+            entries.popitem(last=False)
+        return True
+
+
+class TFrontierLIFO_DL(FrontierLIFO_DL):
+    """ This is a LIFO queue, but nodes that exceed a limit are discarded.
+        The T stands for Transposition table.  Repeated states are pruned using a
+        TranspositionTable, which can be shared by all the iterations of IDS, so
+        what one iteration learns is used by the next.
+    """
+
+    def __init__(self, dlimit, table):
+        """ initialize the Frontier
+            table: a TranspositionTable
+        """
+        FrontierLIFO_DL.__init__(self, dlimit)
+        self._table = table
+
+    def add(self, aNode):
+        """ Add a Node to the Frontier, unless the table says its state can be pruned.
+        """
+        if self._table.visit(aNode.state.key(), aNode.depth):
+            super().add(aNode)
+        else:
+            self.pruned += 1
+
+# end of file
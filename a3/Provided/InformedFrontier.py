@@ -13,11 +13,20 @@
 
 # Simple implementations of the Frontier interface.
 # Implementations in this module inherit from the Frontier class in the Frontier module
-#   FrontierPQ: a base class
+#   BucketQueue: a priority queue for small integer priorities, used by FrontierPQ
+#   FrontierPQ: a base class; a heap, or a BucketQueue with buckets="fifo", "lifo" or "deep"
 #   FrontierUCS(FrontierPQ):
 #   FrontierGBFS(FrontierPQ):
 #   FrontierAStar(FrontierPQ):
 #   GFrontierAStar(FrontierPQ):
+#   CFrontierPQ(FrontierPQ): a base class for graph search, keeping the best path-cost of each state
+#   CFrontierUCS(CFrontierPQ):
+#   CFrontierAStar(CFrontierPQ):
+#   FrontierLIFO_FL(FrontierLIFO): for IDA*
+#   GFrontierLIFO_FL(FrontierLIFO_FL): for IDA*
+#   FrontierARAStar(FrontierPQ): for ARA*; needs State.key()
+#   FrontierSMAStar(FrontierPQ): for SMA*, A* with a limit on the number of Nodes in memory
+#   BatchFrontierAStar: for batch A*; holds packed grids in batches, not SearchNodes
 
 # Assumes a problem class with the methods:
 #   is_goal(problem_state): returns True if the state is the goal state
@@ -28,8 +37,89 @@
 
 # The Frontiers store SearchNodes.  SearchNOdes store ProblemStates.
 
+import collections as collections
 import heapq as heapq
-from Frontier import Frontier
+import math as math
+from Frontier import Frontier, FrontierLIFO
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional; without it, BatchFrontierAStar works on plain lists
+    np = None
+
+
+class BucketQueue(object):
+    """ A priority queue for small non-negative integer priorities.
+        There is one bucket of Nodes for each priority, in a list indexed by priority,
+        and a pointer to the smallest priority that might have a Node in it.
+        Adding is O(1); removing is O(1) plus the distance the pointer moves,
+        which is small when priorities go up slowly, as path-costs and f-values do.
+
+        Nodes with the same priority come out in the order given by tie_break:
+          "fifo": the order they were added (the same as the heap)
+          "lifo": the most recently added first
+          "deep": the deepest Node first (LIFO among Nodes of the same depth),
+                  which heads for a goal when f-values are tied
+    """
+
+    def __init__(self, tie_break="fifo"):
+        """ initialize the queue """
+        self._buckets = []
+        self._min = 0
+        self._size = 0
+        self._tie_break = tie_break
+
+    def __len__(self):
+        """ the number of Nodes in the queue """
+        return self._size
+
+    def push(self, priority, aNode):
+        """ add a Node with the given priority, a non-negative int """
+        buckets = self._buckets
+        while len(buckets) <= priority:
+            buckets.append(collections.deque() if self._tie_break == "fifo" else [])
+        if self._tie_break == "deep":
+            # the bucket is a list of lists, indexed by depth
+            bucket = buckets[priority]
+            while len(bucket) <= aNode.depth:
+                bucket.append([])
+            bucket[aNode.depth].append(aNode)
+        else:
+            buckets[priority].append(aNode)
+        if priority < self._min:
+            self._min = priority
+        self._size += 1
+
+    def pop(self):
+        """ remove a Node with the smallest priority """
+        buckets = self._buckets
+        while not buckets[self._min]:
+            self._min += 1
+        bucket = buckets[self._min]
+        self._size -= 1
+        if self._tie_break == "fifo":
+            return bucket.popleft()
+        elif self._tie_break == "lifo":
+            return bucket.pop()
+        aNode = bucket[-1].pop()
+        # drop the empty depths off the end, so that an empty bucket is an empty list
+        while bucket and not bucket[-1]:
+            bucket.pop()
+        return aNode
+
+    def items(self):
+        """ all the (priority, Node) pairs in the queue, in the order they would be removed """
+        for priority in range(self._min, len(self._buckets)):
+            bucket = self._buckets[priority]
+            if self._tie_break == "fifo":
+                nodes = list(bucket)
+            elif self._tie_break == "lifo":
+                nodes = bucket[::-1]
+            else:
+                nodes = [aNode for depth in reversed(bucket) for aNode in reversed(depth)]
+            for aNode in nodes:
+                yield priority, aNode
 
 
 class FrontierPQ(Frontier):
@@ -57,15 +147,51 @@ class FrontierPQ(Frontier):
        This has the added benefit of ensuring that when there are ties
        for value, the queue will produce the states in the order they
        were generated.
+
+       Path-costs are integers here, and so are many heuristics, so the
+       values are often small integers.  Then a BucketQueue does the same job
+       without the O(log n) heap operations, and with a choice of how ties are
+       broken.  Give buckets="fifo", "lifo" or "deep" to use one (see BucketQueue).
+       If a value turns up that is not a non-negative integer, the Nodes are
+       moved to a heap, and the heap is used from then on.
     """
 
-    def __init__(self):
-        """ initialize the Frontier"""
+    def __init__(self, buckets=None):
+        """ initialize the Frontier
+            buckets: None to use a heap, or the tie_break for a BucketQueue
+        """
         Frontier.__init__(self)
         self._counter = 0
+        if buckets is not None:
+            self._nodes = BucketQueue(buckets)
+        self._buckets = buckets is not None
+
+    def _push(self, value, aNode):
+        """add a Node to the Frontier with the given value"""
+        if self._buckets:
+            if value >= 0 and value % 1 == 0:
+                self._nodes.push(int(value), aNode)
+                return
+            self._use_heap()
+        self._counter += 1
+        heapq.heappush(self._nodes, (value, self._counter, aNode))
+
+    def _use_heap(self):
+        """move the Nodes from the BucketQueue to a heap, in the order they would be removed"""
+        if not self._buckets:
+            return
+        heap = []
+        for value, aNode in self._nodes.items():
+            self._counter += 1
+            heap.append((value, self._counter, aNode))
+        # the list is in sorted order, so it is already a heap
+        self._nodes = heap
+        self._buckets = False
 
     def remove(self):
         """remove a Node from the Frontier"""
+        if self._buckets:
+            return self._nodes.pop()
         val = heapq.heappop(self._nodes)
         # return the state only
         return val[2]
@@ -74,51 +200,173 @@ class FrontierPQ(Frontier):
 class FrontierUCS(FrontierPQ):
     """This version looks at path-cost for ordering"""
 
-    def __init__(self):
+    def __init__(self, buckets=None):
         """ initialize the Frontier"""
-        FrontierPQ.__init__(self)
+        FrontierPQ.__init__(self, buckets)
 
     def add(self, aNode):
         """add a Node to the Frontier"""
-        self._counter += 1
-        heapq.heappush(self._nodes, (aNode.path_cost, self._counter, aNode))
+        self._push(aNode.path_cost, aNode)
 
 
 class FrontierGBFS(FrontierPQ):
     """This version looks at hval for ordering"""
 
-    def __init__(self):
+    def __init__(self, buckets=None):
         """ initialize the Frontier"""
-        FrontierPQ.__init__(self)
+        FrontierPQ.__init__(self, buckets)
 
     def add(self, aNode):
         """add a Node to the Frontier"""
-        self._counter += 1
-        heapq.heappush(self._nodes, (aNode.state.hval, self._counter, aNode))
+        self._push(aNode.state.hval, aNode)
 
 
 class FrontierAStar(FrontierPQ):
     """This version looks at path-cost + hval for ordering"""
 
-    def __init__(self):
+    def __init__(self, buckets=None):
         """ initialize the Frontier"""
-        FrontierPQ.__init__(self)
+        FrontierPQ.__init__(self, buckets)
 
     def add(self, aNode):
         """add a Node to the Frontier"""
-        self._counter += 1
         # print(aNode.path_cost, aNode.state.hval)
-        heapq.heappush(self._nodes, (aNode.path_cost + aNode.state.hval, self._counter, aNode))
+        self._push(aNode.path_cost + aNode.state.hval, aNode)
 
 
 class GFrontierAStar(FrontierPQ):
     """This version looks at path-cost + hval for ordering, but discards any Node
        whose state also appears somewhere on the path from the initial state (i.e., a loop)"""
 
+    def __init__(self, buckets=None):
+        """ initialize the Frontier"""
+        FrontierPQ.__init__(self, buckets)
+
+
+    def add(self, aNode):
+        """ Add a Node to the Frontier
+            In Graph search, we will not add a Node to the Frontier if
+            its state appears in some Node on the path from the initial state
+            We can check this using the Node.parent attribute.
+        """
+        anc = aNode.parent
+        while anc is not None:
+            if anc.state == aNode.state:
+                # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
+                return
+            anc = anc.parent
+        # no parent state is the same, so no loop
+        self._push(aNode.path_cost + aNode.state.hval, aNode)
+
+
+class CFrontierPQ(FrontierPQ):
+    """ A priority queue for graph search.
+        The C stands for Closed set: the smallest path-cost found so far for each state
+        is kept in a dict, keyed by State.key().  A Node is only added if it is
+        the cheapest path to its state so far, so the queue grows with the number
+        of states, not the number of paths.
+        When a cheaper path is found, the Node for the old path is not removed from
+        the heap (that would be slow); it is stale, and it is skipped when it comes out.
+        Subclasses define priority(aNode).
+    """
+
     def __init__(self):
         """ initialize the Frontier"""
         FrontierPQ.__init__(self)
+        self._best_g = {}
+
+    def add(self, aNode):
+        """add a Node to the Frontier, if it is the cheapest path to its state so far"""
+        key = aNode.state.key()
+        best = self._best_g.get(key)
+        if best is not None and aNode.path_cost >= best:
+            self.pruned += 1
+            return
+        self._best_g[key] = aNode.path_cost
+        self._counter += 1
+        heapq.heappush(self._nodes, (self.priority(aNode), self._counter, aNode))
+
+    def _is_stale(self, aNode):
+        """ True if a cheaper path to the Node's state has been added since """
+        return aNode.path_cost > self._best_g[aNode.state.key()]
 
+    def is_empty(self):
+        """ the Frontier is empty when every Node left in the heap is stale """
+        while self._nodes and self._is_stale(self._nodes[0][2]):
+            heapq.heappop(self._nodes)
+        return len(self._nodes) == 0
+
+    def remove(self):
+        """remove the best Node that is not stale"""
+        while True:
+            aNode = heapq.heappop(self._nodes)[2]
+            if not self._is_stale(aNode):
+                return aNode
+
+
+class CFrontierUCS(CFrontierPQ):
+    """This version looks at path-cost for ordering"""
+
+    def __init__(self):
+        """ initialize the Frontier"""
+        CFrontierPQ.__init__(self)
+
+    def priority(self, aNode):
+        """the value used for ordering"""
+        return aNode.path_cost
+
+
+class CFrontierAStar(CFrontierPQ):
+    """This version looks at path-cost + hval for ordering.
+       If hval is consistent, a state is never expanded twice; if not, a state
+       reached more cheaply after it was expanded is added and expanded again.
+    """
+
+    def __init__(self):
+        """ initialize the Frontier"""
+        CFrontierPQ.__init__(self)
+
+    def priority(self, aNode):
+        """the value used for ordering"""
+        return aNode.path_cost + aNode.state.hval
+
+
+class FrontierLIFO_FL(FrontierLIFO):
+    """ This is a LIFO stack, but nodes whose path-cost + hval exceeds a limit are discarded.
+        It is used by IDA*, in the same way that FrontierLIFO_DL is used by IDS.
+        The smallest value that exceeded the limit is remembered, because it is
+        the limit to use on the next iteration.
+    """
+
+    def __init__(self, flimit):
+        """ initialize the Frontier
+            flimit: the largest path-cost + hval allowed into the Frontier.
+        """
+        FrontierLIFO.__init__(self)
+        self._flimit = flimit
+        self._next_limit = None
+
+    def add(self, aNode):
+        """add the new Node on the end, if it is within the limit"""
+        f = aNode.path_cost + aNode.state.hval
+        if f <= self._flimit:
+            self._nodes.append(aNode)
+            return
+        self.pruned += 1
+        if self._next_limit is None or f < self._next_limit:
+            self._next_limit = f
+
+
+class GFrontierLIFO_FL(FrontierLIFO_FL):
+    """ This is FrontierLIFO_FL, but discards any Node whose state also appears
+        somewhere on the path from the initial state (i.e., a loop).
+        Only the ancestors are checked, so memory stays linear in the depth.
+    """
+
+    def __init__(self, flimit):
+        """ initialize the Frontier"""
+        FrontierLIFO_FL.__init__(self, flimit)
 
     def add(self, aNode):
         """ Add a Node to the Frontier
@@ -130,10 +378,435 @@ class GFrontierAStar(FrontierPQ):
         while anc is not None:
             if anc.state == aNode.state:
                 # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
                 return
             anc = anc.parent
         # no parent state is the same, so no loop
+        super().add(aNode)
 
+
+class FrontierARAStar(FrontierPQ):
+    """ The Frontier for ARA* (anytime repairing A*); see InformedSearch.ARAStarSearch().
+        Nodes are ordered by path-cost + weight * hval.  With a weight above 1 a solution
+        is found sooner, but it may cost up to weight times the optimal cost.
+
+        The smallest path-cost seen for each state is kept, keyed by State.key(), and a Node
+        is only added if it improves on it.  A state is expanded at most once per weight
+        (the closed set).  If a cheaper path to a closed state turns up, its Node waits in
+        the INCONS list until the weight changes.  Entries made stale by a cheaper path are
+        left in the queue, and skipped when they come out.
+
+        Once a solution is known, Nodes with path-cost + hval no better than its cost
+        cannot lead to a better one, and are discarded.
+    """
+
+    def __init__(self, weight):
+        """ initialize the Frontier
+            weight: the inflation weight for hval, at least 1
+        """
+        FrontierPQ.__init__(self)
+        self._weight = weight
+        self._g = {}
+        self._closed = set()
+        self._incons = []
+        self._incumbent = None
+
+    def add(self, aNode):
+        """add a Node to the Frontier, if it is the cheapest path to its state so far"""
+        g = aNode.path_cost
+        if self._incumbent is not None and g + aNode.state.hval >= self._incumbent:
+            self.pruned += 1
+            return
+        key = aNode.state.key()
+        best = self._g.get(key)
+        if best is not None and g >= best:
+            self.pruned += 1
+            return
+        self._g[key] = g
+        if key in self._closed:
+            self._incons.append(aNode)
+        else:
+            self._counter += 1
+            heapq.heappush(self._nodes, (g + self._weight * aNode.state.hval, self._counter, aNode))
+
+    def remove(self):
+        """remove the Node with the smallest weighted value.
+           Returns None if only stale entries are left.
+        """
+        while self._nodes:
+            aNode = heapq.heappop(self._nodes)[2]
+            key = aNode.state.key()
+            if aNode.path_cost == self._g[key] and key not in self._closed:
+                self._closed.add(key)
+                return aNode
+        return None
+
+    def set_incumbent(self, cost):
+        """ Remember the cost of the best solution found so far """
+        self._incumbent = cost
+
+    def min_f(self):
+        """ The smallest path-cost + hval among the Nodes not yet expanded,
+            a lower bound on the cost of any solution still to be found.
+            None if there are no such Nodes.
+        """
+        best = None
+        for aNode in self._live():
+            f = aNode.path_cost + aNode.state.hval
+            if best is None or f < best:
+                best = f
+        return best
+
+    def _live(self):
+        """ The Nodes in the queue and the INCONS list that are not stale """
+        for entry in self._nodes:
+            aNode = entry[2]
+            key = aNode.state.key()
+            if aNode.path_cost == self._g[key] and key not in self._closed:
+                yield aNode
+        for aNode in self._incons:
+            if aNode.path_cost == self._g[aNode.state.key()]:
+                yield aNode
+
+    def set_weight(self, weight):
+        """ Change the weight, and get ready to search again: the INCONS Nodes go back
+            in the queue, the closed set is emptied, and the queue is re-ordered.
+            Nodes that cannot beat the incumbent are dropped.
+        """
+        live = {}
+        for aNode in self._live():
+            if self._incumbent is None or aNode.path_cost + aNode.state.hval < self._incumbent:
+                live[aNode.state.key()] = aNode
+        self._weight = weight
+        self._closed = set()
+        self._incons = []
+        self._nodes = []
+        for aNode in live.values():
+            self._counter += 1
+            self._nodes.append((aNode.path_cost + weight * aNode.state.hval, self._counter, aNode))
+        heapq.heapify(self._nodes)
+
+
+class FrontierSMAStar(FrontierPQ):
+    """ A* with a limit on the number of Nodes kept in memory, in the style of SMA*.
+        Every Node in memory counts against the limit: the leaves in the Frontier, and
+        the interior Nodes on the paths to them.  When there are too many, the worst leaf
+        (largest f, shallowest) is dropped.
+        Its f is backed up into its parent: the parent remembers the f of each dropped
+        child (by State.key()), and goes back into the Frontier with the best of them
+        straight away, even if some of its other children are still in memory.  When it is
+        expanded again, only the dropped children with that best f are added, so the
+        children do not all come back at once and push each other out again.
+        Besides the Nodes, memory holds a key and an f for each dropped child of a Node
+        still in memory, so it grows with the branching factor times max_nodes at most.
+        f is path-cost + hval, but never less than the parent's f (pathmax), so backed-up
+        values stay consistent down the tree.
+        Among Nodes with the same f, the deepest is expanded first.
+        Loops are discarded by checking the ancestors, as in GFrontierAStar.
+        The States must have a key() method, as for the CFrontier classes.
+
+        max_nodes should be well above the depth of the solution plus the branching factor,
+        or Nodes will be dropped as soon as they are generated, and expanded again and again.
+    """
+
+    def __init__(self, max_nodes):
+        """ initialize the Frontier
+            max_nodes: the largest number of Nodes to keep in memory, interior Nodes included
+        """
+        FrontierPQ.__init__(self)
+        self._max_nodes = max_nodes
+        self._worst = []        # the leaves among the entries of _nodes, ordered worst first
+        self._live = {}         # Node -> the counter of its current entries; other entries are stale
+        self._f = {}            # Node -> f, for every Node in memory
+        self._kids = {}         # Node -> the keys of its children in memory
+        self._forgotten = {}    # Node -> {key: f} for its dropped children
+        self._expanding = None  # the Node last removed, whose children are being added
+        self._regenerate = None # the keys of its dropped children to add again, or None to add them all
+
+    def __len__(self):
+        """ the number of Nodes in the Frontier (not counting stale entries)"""
+        return len(self._live)
+
+    def is_empty(self):
+        """ the Frontier is empty when no Nodes are live """
+        self._finish_expansion()
+        return len(self._live) == 0
+
+    def add(self, aNode):
+        """ Add a Node to the Frontier, and drop the worst leaves if there are too many Nodes in memory."""
+        anc = aNode.parent
+        while anc is not None:
+            if anc.state == aNode.state:
+                # a loop, so don't add this Node to the Frontier
+                self.pruned += 1
+                return
+            anc = anc.parent
+
+        f = aNode.path_cost + aNode.state.hval
+        parent = aNode.parent
+        if parent is not None:
+            key = aNode.state.key()
+            if parent == self._expanding and self._regenerate is not None:
+                # the parent is being expanded again: only its best dropped children come back
+                if key not in self._regenerate:
+                    return
+                f = max(f, self._forgotten[parent].pop(key))
+            self._kids.setdefault(parent, set()).add(key)
+            f = max(f, self._f[parent])
+        self._f[aNode] = f
+        self._push(aNode, True)
+        self._shrink()
+
+    def remove(self):
+        """remove the Node with the smallest f"""
+        self._finish_expansion()
+        while True:
+            _, _, counter, aNode = heapq.heappop(self._nodes)
+            if self._live.get(aNode) == counter:
+                del self._live[aNode]
+                self._expanding = aNode
+                forgotten = self._forgotten.get(aNode)
+                if forgotten:
+                    best = min(forgotten.values())
+                    self._regenerate = set(key for key, f in forgotten.items() if f == best)
+                return aNode
+
+    def _push(self, aNode, leaf):
+        """ Put a Node (already in _f) into the Frontier; only a leaf can be dropped """
         self._counter += 1
-        # print(aNode.path_cost, aNode.state.hval)
-        heapq.heappush(self._nodes, (aNode.path_cost + aNode.state.hval, self._counter, aNode))
+        f = self._f[aNode]
+        self._live[aNode] = self._counter
+        heapq.heappush(self._nodes, (f, -aNode.depth, self._counter, aNode))
+        if leaf:
+            heapq.heappush(self._worst, (-f, aNode.depth, self._counter, aNode))
+        if len(self._nodes) + len(self._worst) > 4*len(self._live) + 64:
+            self._compact()
+
+    def _shrink(self):
+        """ Drop the worst leaves until the Nodes in memory are within the limit """
+        while len(self._f) > self._max_nodes and self._drop_worst():
+            pass
+
+    def _drop_worst(self):
+        """ Drop the worst leaf.  Its parent goes back into the Frontier in its place,
+            so the Frontier does not always get smaller.
+            :return: False if there was no leaf to drop
+        """
+        while self._worst:
+            _, _, counter, aNode = heapq.heappop(self._worst)
+            if self._live.get(aNode) == counter:
+                del self._live[aNode]
+                self.pruned += 1
+                self._forget(aNode, self._f[aNode])
+                return True
+        return False
+
+    def _forget(self, aNode, f):
+        """ Remove a leaf from memory, and back its f up into its parent """
+        del self._f[aNode]
+        self._kids.pop(aNode, None)
+        self._forgotten.pop(aNode, None)
+        parent = aNode.parent
+        if parent is None:
+            return
+        key = aNode.state.key()
+        self._forgotten.setdefault(parent, {})[key] = f
+        self._kids[parent].discard(key)
+        # a Node still being expanded is dealt with when its expansion is finished
+        if parent == self._expanding:
+            return
+        if self._kids[parent]:
+            self._requeue(parent)
+        else:
+            del self._kids[parent]
+            self._restore(parent)
+
+    def _requeue(self, aNode):
+        """ Some children of a Node have been dropped, and some are still in memory.
+            Put the Node back into the Frontier with the best f of the dropped ones,
+            so they are generated again if that f is ever the smallest.
+        """
+        f = min(self._forgotten[aNode].values())
+        if f == math.inf:
+            # nothing below the dropped children leads anywhere
+            return
+        if aNode in self._live and self._f[aNode] == f:
+            return
+        self._f[aNode] = f
+        self._push(aNode, False)
+
+    def _restore(self, aNode):
+        """ All the children of a Node are gone, so it is a leaf again, with the best of their f values """
+        f = min(self._forgotten[aNode].values())
+        if f == math.inf:
+            # nothing below this Node leads anywhere
+            self._live.pop(aNode, None)
+            self._forget(aNode, f)
+        else:
+            self._f[aNode] = f
+            self._push(aNode, True)
+
+    def _finish_expansion(self):
+        """ Called once all the children of the last Node removed have been added """
+        aNode = self._expanding
+        if aNode is None:
+            return
+        self._expanding = None
+        self._regenerate = None
+        if self._kids.get(aNode):
+            # some of its children are still in memory
+            if self._forgotten.get(aNode):
+                self._requeue(aNode)
+            return
+        self._kids.pop(aNode, None)
+        if not self._forgotten.get(aNode):
+            # it had no children at all: a dead end
+            self._forgotten[aNode] = {None: math.inf}
+        self._restore(aNode)
+        self._shrink()
+
+    def _compact(self):
+        """ Rebuild both queues without the stale entries, so they stay bounded too """
+        self._nodes = [(self._f[n], -n.depth, c, n) for n, c in self._live.items()]
+        self._worst = [(-self._f[n], n.depth, c, n) for n, c in self._live.items() if n not in self._kids]
+        heapq.heapify(self._nodes)
+        heapq.heapify(self._worst)
+
+
+class BatchFrontierAStar(object):
+    """ A Frontier for A* that holds packed grids (ints) instead of SearchNodes, and takes
+        and gives them in batches (see InformedSearch.BatchAStarSearch).
+        The entries are kept in buckets by f = path-cost + hval; a bucket is a list of chunks,
+        and a chunk is a tuple of columns (grids, path-costs, parent grids, action numbers).
+        With NumPy, the columns are arrays, and a batch goes in or out with a few array
+        operations, whatever its size; without it, they are lists.
+        Graph search: each state is expanded once, the first time it comes out, so hval must be
+        consistent.  The parent and action of each state expanded are kept, to rebuild the path.
+        Goal children are not queued; the cheapest one is remembered in goal_cost.
+    """
+
+    def __init__(self):
+        """ initialize the Frontier"""
+        self._buckets = {}      # f -> list of chunks
+        self._keys = []         # a heap of the f values of the buckets
+        self._count = 0         # the number of entries in all the buckets
+        self._expanded = {}     # grid -> (parent grid, action number), for every state expanded
+        self.goal_cost = None   # the path-cost of the cheapest goal child seen, if any
+        self.goal_parent = None # its parent's grid
+        self.goal_action = None # and the number of its action
+        self.pruned = 0
+
+    def __len__(self):
+        """ the number of entries in the Frontier, including repeated states """
+        return self._count
+
+    def is_empty(self):
+        """ the Frontier is empty when there are no entries """
+        return self._count == 0
+
+    def min_f(self):
+        """ the smallest f in the Frontier, or None if it is empty """
+        return self._keys[0] if self._keys else None
+
+    def add_root(self, bits, hval):
+        """ Add the initial state """
+        self._push(hval, ([bits], [0], [bits], [-1]))
+
+    def add_batch(self, parents, costs, children, goals, hvals):
+        """ Add the children of a batch of parents, as returned by the Problem's expand_batch().
+            :param parents: the grids of the parents, as returned by remove_all()
+            :param costs: the path-costs of the parents
+            :param children, goals, hvals: 2-d, a row for each parent and a column for each action
+        """
+        if np is not None and isinstance(children, np.ndarray):
+            nparents, nactions = children.shape
+            g = np.repeat(np.asarray(costs) + 1, nactions)
+            f = g + np.asarray(hvals).ravel()
+            grids = children.ravel()
+            from_grids = np.repeat(np.asarray(parents, dtype=np.uint64), nactions)
+            actions = np.tile(np.arange(nactions), nparents)
+            is_goal = np.asarray(goals).ravel()
+            if is_goal.any():
+                where = np.flatnonzero(is_goal)
+                best = where[np.argmin(g[where])]
+                self._goal(g[best].item(), from_grids[best].item(), actions[best].item())
+                keep = ~is_goal
+                f, g, grids, from_grids, actions = f[keep], g[keep], grids[keep], from_grids[keep], actions[keep]
+            # one chunk for each value of f
+            order = np.argsort(f, kind='stable')
+            f = f[order]
+            values, starts = np.unique(f, return_index=True)
+            ends = np.append(starts[1:], len(f))
+            for value, start, end in zip(values.tolist(), starts.tolist(), ends.tolist()):
+                rows = order[start:end]
+                self._push(value, (grids[rows], g[rows], from_grids[rows], actions[rows]))
+        else:
+            chunks = {}
+            for parent, cost, row, goal_row, h_row in zip(parents, costs, children, goals, hvals):
+                for action, (bits, goal, hval) in enumerate(zip(row, goal_row, h_row)):
+                    if goal:
+                        self._goal(cost + 1, parent, action)
+                        continue
+                    chunk = chunks.get(cost + 1 + hval)
+                    if chunk is None:
+                        chunk = chunks[cost + 1 + hval] = ([], [], [], [])
+                    for column, value in zip(chunk, (bits, cost + 1, parent, action)):
+                        column.append(value)
+            for value, chunk in chunks.items():
+                self._push(value, chunk)
+
+    def remove_all(self):
+        """ Remove every entry with the smallest f, except the states already expanded and
+            the repeats within the batch, and record them as expanded.
+            :return: (f, grids, path-costs); the batch may be empty if all its states were repeats
+        """
+        f = heapq.heappop(self._keys)
+        chunks = self._buckets.pop(f)
+        self._count -= sum(len(chunk[0]) for chunk in chunks)
+        if np is not None and isinstance(chunks[0][0], np.ndarray):
+            grids, costs, from_grids, actions = [np.concatenate(column) for column in zip(*chunks)]
+            # the first of each state, in order; all have the same f, so the same path-cost
+            _, first = np.unique(grids, return_index=True)
+            first.sort()
+            seen = np.fromiter(map(self._expanded.__contains__, grids[first].tolist()), dtype=bool, count=len(first))
+            rows = first[~seen]
+            self.pruned += len(grids) - len(rows)
+            grids, costs = grids[rows], costs[rows]
+            self._expanded.update(zip(grids.tolist(), zip(from_grids[rows].tolist(), actions[rows].tolist())))
+            return f, grids, costs
+        grids = []
+        costs = []
+        for chunk in chunks:
+            for bits, cost, parent, action in zip(*chunk):
+                if bits in self._expanded:
+                    self.pruned += 1
+                    continue
+                self._expanded[bits] = (parent, action)
+                grids.append(bits)
+                costs.append(cost)
+        return f, grids, costs
+
+    def path(self, bits):
+        """ Return the action numbers that lead from the initial state to an expanded state """
+        actions = []
+        parent, action = self._expanded[bits]
+        while action >= 0:
+            actions.append(action)
+            parent, action = self._expanded[parent]
+        actions.reverse()
+        return actions
+
+    def _push(self, f, chunk):
+        """ Add a chunk of entries with the given f """
+        if f not in self._buckets:
+            self._buckets[f] = []
+            heapq.heappush(self._keys, f)
+        self._buckets[f].append(chunk)
+        self._count += len(chunk[0])
+
+    def _goal(self, cost, parent, action):
+        """ Remember a goal child, if it is the cheapest so far """
+        if self.goal_cost is None or cost < self.goal_cost:
+            self.goal_cost = cost
+            self.goal_parent = parent
+            self.goal_action = action
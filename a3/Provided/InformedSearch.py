@@ -23,11 +23,19 @@
 #   actions(problem_state): returns a list of all valid actions in state
 #                           (the actions are only passed to result())
 #   result(state, action): returns a new state that is the result of doing action in state.
+# BeamSearch and ARAStarSearch also assume
+#   objective_function(state): returns a number, smaller for better states, 0 for the goal (BeamSearch)
+#   State.key(): returns a hashable value; two states with the same key are the same state.
 #
 # Search methods are based on TreeSearch (no repeated state checking):
-# 1. UCSSearch(s)
+# 1. UCSSearch(s, search_type)
 # 2. BestFirstSearch(s)
-# 3. AStarSearch(s)
+# 3. AStarSearch(s, search_type)
+# 4. IDAStarSearch(s)
+# 5. BeamSearch(s, width)
+# 6. ARAStarSearch(s, weight, step)
+# 7. SMAStarSearch(s, max_nodes)
+# 8. BatchAStarSearch(s)
 # These methods return a SearchTerminationRecord object, containing information about the search.
 # See the definition in UninformedSearch.
 #
@@ -41,6 +49,8 @@
 #   print(str(result))
 #   # or public access to any of the data stored in the result.
 
+import heapq as heapq
+import time as time
 import InformedFrontier as Frontiers
 import UninformedSearch as BlindSearch
 
@@ -48,28 +58,279 @@ import UninformedSearch as BlindSearch
 class InformedSearch(BlindSearch.Search):
     """A class to contain informed search algorithms."""
 
-    def __init__(self, problem, timelimit=10):
+    def __init__(self, problem, timelimit=10, node_pool=False, instrument=False):
         """The Search object needs to be given:
             the search Problem,
             a queue for Node(s) to explore
             possibly a depth limit to terminate search
+            optionally, node_pool=True to store nodes compactly (see UninformedSearch.NodePool)
+            optionally, instrument=True to count and time the parts of each search (see UninformedSearch.SearchStats);
+                only the methods that use _tree_search() are instrumented
         """
-        BlindSearch.Search.__init__(self, problem, timelimit=timelimit)
+        BlindSearch.Search.__init__(self, problem, timelimit=timelimit, node_pool=node_pool,
+                                    instrument=instrument)
 
-    def BestFirstSearch(self, initialState):
+    def BestFirstSearch(self, initialState, buckets=None):
+        """
+        :param buckets: None to keep the Frontier in a heap, or "fifo", "lifo" or "deep" to use
+                        buckets when the values are small integers (see InformedFrontier.BucketQueue)
+        """
         # configure search
-        self._frontier = Frontiers.FrontierGBFS()
+        self._frontier = Frontiers.FrontierGBFS(buckets)
         # run search
         return self._tree_search(initialState)
 
-    def UCSSearch(self, initialState):
+    def UCSSearch(self, initialState, search_type="tree", buckets=None):
+        """
+        :param search_type: "tree", or "closed" to keep the best path-cost of each state
+                            (which needs State.key())
+        :param buckets: as for BestFirstSearch; only for "tree"
+        """
         # configure search
-        self._frontier = Frontiers.FrontierUCS()
+        if search_type == "tree":
+            self._frontier = Frontiers.FrontierUCS(buckets)
+        elif search_type == "closed":
+            self._frontier = Frontiers.CFrontierUCS()
         # run search
         return self._tree_search(initialState)
 
-    def AStarSearch(self, initialState):
+    def AStarSearch(self, initialState, search_type="graph", buckets=None):
+        """
+        :param search_type: "tree", or "graph" to discard Nodes whose state is one of their ancestors,
+                            or "closed" to keep the best path-cost of each state (which needs State.key())
+        :param buckets: as for BestFirstSearch; only for "tree" and "graph"
+        """
         # configure search
-        self._frontier = Frontiers.GFrontierAStar()
+        if search_type == "tree":
+            self._frontier = Frontiers.FrontierAStar(buckets)
+        elif search_type == "graph":
+            self._frontier = Frontiers.GFrontierAStar(buckets)
+        elif search_type == "closed":
+            self._frontier = Frontiers.CFrontierAStar()
         # run search
         return self._tree_search(initialState)
+
+    def SMAStarSearch(self, initialState, max_nodes):
+        """A* with at most max_nodes Nodes in memory (see InformedFrontier.FrontierSMAStar).
+           When memory is full, the worst leaves are forgotten, and their f values are backed up
+           into their parents, at the cost of expanding some Nodes again.  With an admissible
+           heuristic, the answer is optimal if there is room for the path to the shallowest
+           optimal solution and the children of one Node.
+           :return: SearchTerminationRecord; space is the largest number of Nodes in the Frontier
+        """
+        # configure search
+        self._frontier = Frontiers.FrontierSMAStar(max_nodes)
+        # run search
+        return self._tree_search(initialState)
+
+    def BatchAStarSearch(self, initialState):
+        """A* that expands every state with the smallest f at once, as one batch
+           (see InformedFrontier.BatchFrontierAStar).  The children of the whole batch, with
+           their goal flags and hvals, come from one call to the Problem's expand_batch(), and
+           go into the Frontier in one call, so with NumPy no Python code runs once per child.
+           The Frontier holds packed grids, not SearchNodes; the nodes on the solution path are
+           rebuilt at the end.  Needs a problem with expand_batch() and calc_h_batch(), such as
+           coloredTiles.InformedBitProblemReds; the ordered and symmetry options are not used.
+           Graph search: a state is expanded once, so hval must be consistent.
+           Time is only checked between batches.  The search is not instrumented.
+           :return: SearchTerminationRecord; nodes is the number of states expanded
+        """
+        problem = self._problem
+        start_time = time.time()
+        now = start_time
+        if problem.is_goal(initialState):
+            return BlindSearch.SearchTerminationRecord(success=True, result=BlindSearch.SearchNode(initialState, None),
+                        nodes=1, space=1, time=0.00001)
+        frontier = Frontiers.BatchFrontierAStar()
+        frontier.add_root(problem.encode_state(initialState), initialState.hval)
+        node_counter = 0
+        max_space = 0
+
+        # a goal child is the answer once nothing in the Frontier could lead to a cheaper one
+        while (not frontier.is_empty() and now - start_time < self._time_limit
+               and (frontier.goal_cost is None or frontier.min_f() < frontier.goal_cost)):
+            max_space = max(max_space, len(frontier))
+            _, grids, costs = frontier.remove_all()
+            node_counter += len(grids)
+            if len(grids) > 0:
+                children, goals, hvals = problem.expand_batch(grids)
+                frontier.add_batch(grids, costs, children, goals, hvals)
+            now = time.time()
+
+        now = time.time()
+        if frontier.goal_cost is None or (not frontier.is_empty() and frontier.min_f() < frontier.goal_cost):
+            # out of time, or no solution
+            return BlindSearch.SearchTerminationRecord(success=False, result=None,
+                        nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+
+        # rebuild the nodes on the path to the goal
+        node = BlindSearch.SearchNode(initialState, None)
+        for action in frontier.path(frontier.goal_parent) + [frontier.goal_action]:
+            node = BlindSearch.SearchNode(problem.result(node.state, problem.actions_cache[action]), node)
+        return BlindSearch.SearchTerminationRecord(success=True, result=node,
+                    nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+
+    def IDAStarSearch(self, initialState):
+        """Iterative deepening A* does a depth-first search that discards nodes whose
+           path-cost + hval exceeds a limit.  The first limit is the hval of the initial state;
+           each later limit is the smallest value that exceeded the previous one.
+           Only the current path and its siblings are stored, so memory is linear in the depth.
+           :return: SearchTerminationRecord
+        """
+        limit = initialState.hval
+        nodes = 0
+        time = 0
+        space = 0
+        # with instrument=True, the stats of all the iterations are added up
+        stats = BlindSearch.SearchStats() if self._instrument else None
+        while time < self._time_limit:
+            self._frontier = Frontiers.GFrontierLIFO_FL(limit)
+            answer = self._tree_search(initialState)
+            nodes += answer.nodes
+            time += answer.time    # this could result in search that is substantial longer than the limit
+            space = max(answer.space, space)
+            if stats is not None:
+                stats.add(answer.stats)
+            if answer.success:
+                answer.nodes = nodes
+                answer.time = time
+                answer.space = space
+                answer.stats = stats
+                return answer
+            elif self._frontier._next_limit is None:
+                # nothing was discarded, so the whole space was searched
+                break
+            else:
+                limit = self._frontier._next_limit
+
+        return BlindSearch.SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time,
+                                                   stats=stats)
+
+    def BeamSearch(self, initialState, width):
+        """Beam search goes one layer at a time, like breadth-first search, but keeps only the
+           width nodes with the smallest hval in each layer.  A state that appears more than once
+           in a layer is kept once.  Memory is bounded by width times the branching factor.
+           Beam search is not complete, so it runs until it finds the goal or runs out of time.
+           Either way, it returns a usable answer: when time runs out, the result is the node with
+           the best objective_function() seen so far, and success is False.
+           Nodes are always SearchNodes, so the ones that fall out of the beam are freed.
+           :param width: the number of nodes kept in each layer
+           :return: SearchTerminationRecord
+        """
+        start_time = time.time()
+        now = start_time
+        layer = [BlindSearch.SearchNode(initialState, None)]
+        best = layer[0]
+        best_value = self._problem.objective_function(initialState)
+        node_counter = 0
+        max_space = 1
+        counter = 0
+
+        while layer and now - start_time < self._time_limit:
+            # the children of this layer, one per state
+            children = {}
+            for node in layer:
+                this_state = node.state
+                node_counter += 1
+                now = time.time()
+                if self._problem.is_goal(this_state):
+                    return BlindSearch.SearchTerminationRecord(success=True, result=node,
+                                nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+                if now - start_time >= self._time_limit:
+                    break
+                for act in self._problem.actions(this_state):
+                    child = self._problem.result(this_state, act)
+                    key = child.key()
+                    if key not in children:
+                        # the counter breaks ties in order of generation
+                        children[key] = (child.hval, counter, child, node)
+                        counter += 1
+            max_space = max(max_space, len(children))
+
+            # the next layer is the best of the children
+            layer = []
+            for _, _, child, parent in heapq.nsmallest(width, children.values()):
+                node = BlindSearch.SearchNode(child, parent)
+                layer.append(node)
+                value = self._problem.objective_function(child)
+                if value < best_value:
+                    best = node
+                    best_value = value
+
+        # out of time: return the best node found
+        now = time.time()
+        return BlindSearch.SearchTerminationRecord(success=False, result=best,
+                    nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+
+    def ARAStarSearch(self, initialState, weight=2.0, step=0.5):
+        """Anytime repairing A* (ARA*) finds a first solution quickly with weighted A*,
+           ordering nodes by path-cost + weight * hval.  Then it lowers the weight by step,
+           and searches again, reusing what it has already found, to improve the solution.
+           It stops when the weight reaches 1 (the last solution is optimal, if hval is
+           consistent), when no better solution can exist, or when time runs out.
+           Time is only checked between expansions, so re-ordering a very large queue
+           when the weight changes can take the search past the limit.
+
+           Every improved solution is published in the list record.solutions, as tuples
+           (node, cost, bound, time): bound is how far from optimal the cost can be (a factor;
+           1.0 means optimal), and time is when it was found.  A solution proved optimal
+           later is published again with bound 1.0.  record.result is the best one.
+           Nodes are always SearchNodes.
+           :param weight: the first inflation weight, at least 1
+           :param step: how much the weight is lowered after each solution
+           :return: SearchTerminationRecord
+        """
+        self._frontier = Frontiers.FrontierARAStar(weight)
+        start_time = time.time()
+        now = start_time
+        self._frontier.add(BlindSearch.SearchNode(initialState, None))
+        node_counter = 0
+        max_space = 0
+        incumbent = None
+        solutions = []
+
+        while now - start_time < self._time_limit:
+            # search with the current weight, until a solution or an empty queue
+            found = None
+            while now - start_time < self._time_limit:
+                max_space = max(max_space, len(self._frontier))
+                this_node = self._frontier.remove()
+                if this_node is None:
+                    break
+                this_state = this_node.state
+                node_counter += 1
+                now = time.time()
+                if self._problem.is_goal(this_state):
+                    found = this_node
+                    break
+                for act in self._problem.actions(this_state):
+                    child = self._problem.result(this_state, act)
+                    self._frontier.add(BlindSearch.SearchNode(child, this_node))
+
+            if found is None:
+                # out of time, or nothing left that could be better than the incumbent
+                if this_node is None and incumbent is not None:
+                    # the incumbent is optimal: publish it again with the tighter bound
+                    solutions.append((incumbent, incumbent.path_cost, 1.0, max(now - start_time, 0.00001)))
+                break
+
+            incumbent = found
+            self._frontier.set_incumbent(found.path_cost)
+            lower = self._frontier.min_f()
+            if lower is None or lower >= found.path_cost:
+                bound = 1.0
+            elif lower > 0:
+                bound = min(weight, found.path_cost / lower)
+            else:
+                bound = weight
+            solutions.append((found, found.path_cost, bound, max(now - start_time, 0.00001)))
+            if weight <= 1 or bound <= 1:
+                break
+            weight = max(1, weight - step)
+            self._frontier.set_weight(weight)
+
+        now = time.time()
+        record = BlindSearch.SearchTerminationRecord(success=incumbent is not None, result=incumbent,
+                    nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+        record.solutions = solutions
+        return record
@@ -0,0 +1,185 @@
+# CMPT 317: Pattern database heuristic for the Colored Tiles problem.
+
+# A pattern database stores the exact solution cost of a simpler (abstract) version
+# of the problem, for every abstract state.  Here the abstraction keeps only a band
+# of consecutive rows of the grid, and ignores every tile outside the band.
+# Any touch that flips a tile in the band is an abstract action, costing 1.
+#
+# A real solution, restricted to the touches that affect the band, also solves the
+# abstract problem, so the abstract cost is never more than the real cost.
+# Each band gives an admissible estimate, and so does the maximum over all bands.
+#
+# The databases depend only on the grid size.  They are built once, by breadth-first
+# search outward from the all-green band (touches undo themselves, so this is the same
+# as searching backwards from the goal), and saved to a binary file:
+#   header: magic b'CTPD', version, nrows, ncols, rows per band (little-endian uint16)
+#   tables: one byte per abstract state, for each band in order from the top row
+# At run time the file is memory-mapped, so loading costs almost nothing, and
+# computing h is one lookup per band.
+#
+# Usage:
+#   python PatternDatabase.py nrows ncols      # build the database ahead of time
+#
+#   import PatternDatabase as PDB
+#   pdb = PDB.load(nrows, ncols)     # builds the file first if it is not cached yet
+#   h = pdb.h(bits)                  # bits is the packed grid, as in coloredTiles.BitState
+
+import mmap as mmap
+import os as os
+import struct as struct
+import sys as sys
+import tempfile as tempfile
+import coloredTiles as P
+
+MAGIC = b'CTPD'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHH')
+
+# the largest band, in tiles; each table has 2**MAX_BAND_TILES entries
+MAX_BAND_TILES = 16
+
+# the databases are cached here, one file per grid size
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb_cache')
+
+
+def band_height(nrows, ncols):
+    """Return the number of rows in each band, for a grid of the given size."""
+    return max(1, min(nrows, MAX_BAND_TILES // ncols))
+
+
+def pdb_path(nrows, ncols):
+    """Return the name of the cache file for a grid of the given size."""
+    return os.path.join(CACHE_DIR, 'tiles_{}x{}.pdb'.format(nrows, ncols))
+
+
+def build_band(nrows, ncols, first, last):
+    """Compute the pattern database for the band of rows first..last-1.
+       :return: a bytearray; entry i is the cost to turn band pattern i all green
+    """
+    shift = first * ncols
+    size = 1 << ((last - first) * ncols)
+    band = size - 1
+
+    # the abstract actions: every touch that flips something in the band, projected onto it
+    actions = set()
+    for m in P.touch_masks(nrows, ncols):
+        a = (m >> shift) & band
+        if a:
+            actions.add(a)
+    actions = list(actions)
+
+    # breadth-first search from the all-green band, one layer at a time
+    unknown = 255
+    table = bytearray([unknown]) * size
+    table[0] = 0
+    layer = [0]
+    cost = 0
+    while layer:
+        cost += 1
+        next_layer = []
+        for s in layer:
+            for a in actions:
+                t = s ^ a
+                if table[t] == unknown:
+                    table[t] = min(cost, unknown - 1)
+                    next_layer.append(t)
+        layer = next_layer
+    # patterns that cannot be made green in the band alone are not reachable in the real
+    # problem either; 0 keeps the estimate admissible for them anyway
+    for i in range(size):
+        if table[i] == unknown:
+            table[i] = 0
+    return table
+
+
+def build(nrows, ncols, path=None):
+    """Build the pattern databases for a grid of the given size, and save them to a file.
+       :return: the name of the file written
+    """
+    if path is None:
+        path = pdb_path(nrows, ncols)
+    height = band_height(nrows, ncols)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # write to a temporary file first, so that a half-written file is never loaded;
+    # the name is unique, so processes building the same database at once do not collide
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory or None)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, nrows, ncols, height))
+            for first in range(0, nrows, height):
+                f.write(build_band(nrows, ncols, first, min(first + height, nrows)))
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # another process got there first (and on some systems, a file that is
+            # mapped cannot be replaced); its database is the same as this one
+            if not os.path.exists(path):
+                raise
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+class PatternDatabase(object):
+    """A set of memory-mapped pattern databases for one grid size."""
+
+    def __init__(self, path):
+        """Open and memory-map the given database file.
+           :param path: a file written by build()
+        """
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, nrows, ncols, height = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a pattern database file'.format(path))
+        self.nrows = nrows
+        self.ncols = ncols
+
+        # for each band: (offset of its table, shift to its tiles, mask of its tiles)
+        self._bands = []
+        offset = HEADER.size
+        for first in range(0, nrows, height):
+            tiles = (min(first + height, nrows) - first) * ncols
+            self._bands.append((offset, first * ncols, (1 << tiles) - 1))
+            offset += 1 << tiles
+        if offset != len(self._map):
+            raise ValueError('{} is truncated'.format(path))
+
+    def h(self, bits):
+        """Return the admissible estimate for the packed grid: the largest band cost."""
+        table = self._map
+        best = 0
+        for offset, shift, mask in self._bands:
+            cost = table[offset + ((bits >> shift) & mask)]
+            if cost > best:
+                best = cost
+        return best
+
+
+_loaded = {}
+
+def load(nrows, ncols):
+    """Return the PatternDatabase for the given grid size.
+       The file is built if it is not in the cache yet, and it is only mapped once per process.
+    """
+    key = (nrows, ncols)
+    if key not in _loaded:
+        path = pdb_path(nrows, ncols)
+        # another process may be building it too; that is safe, and whichever finishes
+        # last replaces the file with an identical one
+        if not os.path.exists(path):
+            build(nrows, ncols, path)
+        _loaded[key] = PatternDatabase(path)
+    return _loaded[key]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('usage: python', sys.argv[0], 'nrows ncols')
+        sys.exit()
+    print('Wrote', build(int(sys.argv[1]), int(sys.argv[2])))
+
+# end of file
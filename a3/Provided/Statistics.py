@@ -13,19 +13,38 @@
 # added, so that the mean and variance can be calculated quickly  
 # as needed.  This approach means that we do not need to store  
 # the data values themselves, which could save a lot of space.
+#
+# Quantiles (e.g. the median) are estimated without storing the data too:
+# the values are counted in buckets whose bounds grow geometrically, so the
+# estimate is within a small relative error, and the number of buckets grows
+# only with the log of the range of the values.
+# Two Statistics objects can be merged, e.g. when each worker process keeps one.
+
+import math as math
+
 
 class Statistics(object):
 
-    def __init__(self):
+    def __init__(self, accuracy=0.01):
         """
         Purpose:
             Create a Statistics object.
+        Pre-Conditions:
+            accuracy: the relative accuracy of the values returned by quantile()
         """
         self.__count = 0      # how many data values have been seen
         self.__avg = 0        # the running average so far
         self.__sumsqdiff = 0  # the sum of the square differences
         self.__min = None
         self.__max = None
+        # the quantile sketch: counts of values in buckets whose bounds grow
+        # by a factor of gamma, so every value in a bucket is within the accuracy
+        # of the bucket's middle; negative values are kept by their magnitude
+        self.__gamma = (1 + accuracy) / (1 - accuracy)
+        self.__log_gamma = math.log(self.__gamma)
+        self.__positive = {}  # bucket index: count
+        self.__negative = {}  # bucket index: count
+        self.__zeros = 0
 
     def add(self, value):
         """
@@ -50,6 +69,92 @@ class Statistics(object):
         if self.__min is None or self.__min > value:
             self.__min = value
 
+        if value > 0:
+            i = self.__bucket(value)
+            self.__positive[i] = self.__positive.get(i, 0) + 1
+        elif value < 0:
+            i = self.__bucket(-value)
+            self.__negative[i] = self.__negative.get(i, 0) + 1
+        else:
+            self.__zeros += 1
+
+    def __bucket(self, magnitude):
+        # the index i of the bucket (gamma**(i-1), gamma**i] holding the given positive value
+        return math.ceil(math.log(magnitude) / self.__log_gamma)
+
+    def __middle(self, i):
+        # the value in bucket i with the smallest relative error to every value in the bucket
+        return 2 * self.__gamma**i / (self.__gamma + 1)
+
+    def merge(self, other):
+        """
+        Purpose:
+            Add the values seen by another Statistics object into this one,
+            as if they had all been added here.  Statistics objects can be pickled,
+            so each worker process can keep its own, and they can be merged at the end.
+        Pre-Conditions:
+            other: a Statistics object, created with the same accuracy
+                   (ValueError is raised if it was not: the quantile buckets would not match)
+        Post-Conditions:
+            the statistics include the values seen by other
+        Return:
+            none
+        """
+        if other.__gamma != self.__gamma:
+            raise ValueError('cannot merge Statistics with different accuracies')
+        if other.__count == 0:
+            return
+        # Chan et al.'s formula for combining the means and square differences of two groups
+        count = self.__count + other.__count
+        delta = other.__avg - self.__avg
+        self.__avg += delta * other.__count / count
+        self.__sumsqdiff += other.__sumsqdiff + delta**2 * self.__count * other.__count / count
+        self.__count = count
+
+        if self.__max is None or self.__max < other.__max:
+            self.__max = other.__max
+
+        if self.__min is None or self.__min > other.__min:
+            self.__min = other.__min
+
+        for i, n in other.__positive.items():
+            self.__positive[i] = self.__positive.get(i, 0) + n
+        for i, n in other.__negative.items():
+            self.__negative[i] = self.__negative.get(i, 0) + n
+        self.__zeros += other.__zeros
+
+    def quantile(self, q):
+        """
+        Purpose:
+            Return the q-quantile of all the values seen so far,
+            e.g. q = 0.5 for the median, q = 0.95 for the 95th percentile.
+            The values are not stored, so the answer is approximate: it is within the
+            accuracy given to the constructor (relative to the true quantile's size).
+        Pre-conditions:
+            q: a number between 0 and 1
+        Post-conditions:
+            (none)
+        Return:
+            The q-quantile of the data seen so far.
+            Note: if no data has been seen, None is returned.
+        """
+        if self.__count == 0:
+            return None
+        rank = q * (self.__count - 1)
+        seen = 0
+        for i in sorted(self.__negative, reverse=True):
+            seen += self.__negative[i]
+            if seen > rank:
+                return max(-self.__middle(i), self.__min)
+        seen += self.__zeros
+        if seen > rank:
+            return 0
+        for i in sorted(self.__positive):
+            seen += self.__positive[i]
+            if seen > rank:
+                return min(self.__middle(i), self.__max)
+        return self.__max
+
     def mean(self):
         """
         Purpose:
@@ -13,7 +13,9 @@
 
 # This module defines the classes:
 #     SearchNode (inherits from Python object class)
+#     NodePool and PooledNode (inherit from Python object class)
 #     SearchTerminationRecord (inherits from Python object class)
+#     SearchStats (inherits from Python object class)
 #     Search (inherits from Python object class)
 
 # Assumes a problem class with the methods:
@@ -23,10 +25,15 @@
 #   result(state, action): returns a new state that is the result of doing action in state.
 #
 # Search methods are based on TreeSearch (no repeated state checking):
-# 1. DepthFirstSearch(s)
-# 2. BreadthFirstSearch(s)
-# 3. DepthLimitedSearch(s, dlimit)
-# 4. IDS(s)
+# 1. DepthFirstSearch(s, search_type)
+# 2. BreadthFirstSearch(s, search_type)
+# 3. DepthLimitedSearch(s, dlimit, search_type)
+# 4. IDS(s, search_type)
+# 5. BidirectionalSearch(s)
+# The search_type "graph" checks each Node's ancestors for repeated states;
+# the search_type "closed" keeps a closed set of states, which needs State.key();
+# the search_type "table" (DepthLimitedSearch and IDS only) keeps a bounded table of states
+# from one iteration of IDS to the next, which also needs State.key().
 # These methods return a SearchTerminationRecord object, containing information about the search.  See the definition below.
 #
 # Usage:
@@ -40,14 +47,26 @@
 #   or public access to any of the data stored in the result.
 
 # ALL SEARCH IS SUBJECT TO A TIME LIMIT.
+#
+# Search(pi, <timelimit>, instrument=True) counts and times the parts of each search
+# (see SearchStats); the breakdown is in result.stats.  It is off by default,
+# and then the search loop calls the Problem and Frontier methods directly.
 
+import array as array
 import time as time
 import Frontier as Frontiers
 
 
+# the default number of states in the transposition table of search_type "table"
+TABLE_SIZE = 1000000
+
+
 class SearchNode(object):
     """A data structure to store search information"""
 
+    # no per-instance __dict__: a search can create millions of these
+    __slots__ = ('state', 'parent', 'path_cost', 'depth')
+
     def __init__(self, state, parent_node, step_cost=1):
         """A SearchNode stores
              a single Problem state,
@@ -85,19 +104,206 @@ class SearchNode(object):
         disp(self)
 
 
+class NodePool(object):
+    """A compact store for the nodes of one search.
+       Instead of one object per node, the pool keeps parallel arrays (columns):
+           the encoded state, the parent's index, the depth and action packed together,
+           and, only when they are needed, the path cost and the state's hval.
+       A node is its index into the columns.  The search works with PooledNode handles,
+       which are made when a node is added or its parent is asked for, and can be
+       dropped once the node has left the frontier.  A node's State is rebuilt from the
+       pool whenever it is needed.
+
+       Each column starts with the narrowest type that fits, and is widened when a value
+       does not fit.  The path cost column is only made once a step cost is not 1 (until
+       then, the path cost is the depth), and the hval column once an hval is not 0.
+       Path costs and hvals are kept as ints while they are whole numbers, and the
+       column is switched to floats when one is not.
+       On a 4x4 grid, the columns take about 10 bytes per node, or 18 with hvals, and a
+       handle costs about 50 bytes more while the frontier holds it.
+
+       This assumes the Problem has two extra methods:
+           encode_state(s): returns an int that identifies the state s
+           decode_state(code): returns the State for an int returned by encode_state()
+    """
+
+    # the depth is stored shifted left past the action's position in _action_list
+    action_bits = 16
+
+    def __init__(self, problem):
+        """Create an empty pool for the given Problem"""
+        self._problem = problem
+        self._codes = array.array('B')
+        self._parents = array.array('i')
+        self._steps = array.array('I')
+        self._costs = None
+        self._hvals = None
+        # actions are stored once here, and referred to by their position
+        self._action_list = []
+        self._action_index = {}
+        # the handles of this pool are ints, of a subclass that knows the pool
+        self._handle = type('PooledNode', (PooledNode,), {'__slots__': (), '_pool': self})
+
+    def __len__(self):
+        """The number of nodes in the pool"""
+        return len(self._parents)
+
+    def add(self, state, parent_node, step_cost=1):
+        """Store a new node, and return a handle for it.
+           The arguments are the same as for SearchNode().
+        """
+        i = len(self._parents)
+        self._codes = _append_int(self._codes, self._problem.encode_state(state))
+
+        act = state.action
+        if act not in self._action_index:
+            if len(self._action_list) == 1 << self.action_bits:
+                raise ValueError('too many different actions for a NodePool')
+            self._action_index[act] = len(self._action_list)
+            self._action_list.append(act)
+
+        if parent_node is None:
+            self._parents = _append_int(self._parents, -1)
+            depth = 0
+            cost = 0
+        else:
+            p = int(parent_node)
+            self._parents = _append_int(self._parents, p)
+            depth = self.depth(p) + 1
+            cost = self.path_cost(p) + step_cost
+        self._steps = _append_int(self._steps, depth << self.action_bits | self._action_index[act])
+        if self._costs is None and cost != depth:
+            self._costs = array.array('q', (self.depth(j) for j in range(i)))
+        if self._costs is not None:
+            self._costs = _append_number(self._costs, cost)
+
+        hval = getattr(state, 'hval', 0)
+        if self._hvals is None and hval != 0:
+            self._hvals = array.array('q', bytes(8*i))
+        if self._hvals is not None:
+            self._hvals = _append_number(self._hvals, hval)
+        return self._handle(i)
+
+    def depth(self, i):
+        """The depth of node i"""
+        return self._steps[i] >> self.action_bits
+
+    def path_cost(self, i):
+        """The path cost of node i"""
+        if self._costs is None:
+            return self._steps[i] >> self.action_bits
+        return self._costs[i]
+
+    def state(self, i):
+        """Rebuild the State of node i"""
+        s = self._problem.decode_state(self._codes[i])
+        s.action = self._action_list[self._steps[i] & ((1 << self.action_bits) - 1)]
+        if hasattr(s, 'hval') and self._hvals is not None:
+            s.hval = self._hvals[i]
+        return s
+
+
+# the next wider type for an array column of ints
+_wider = {'B': 'H', 'H': 'I', 'I': 'Q', 'i': 'q'}
+
+def _append_int(column, value):
+    """Append value to an array column of ints.
+       The column is copied into a wider one first if value does not fit,
+       or into a list if no array type is wide enough.
+       :return: the column, which is a new array if it was copied
+    """
+    try:
+        column.append(value)
+        return column
+    except OverflowError:
+        if column.typecode in _wider:
+            column = array.array(_wider[column.typecode], column)
+        else:
+            column = list(column)
+        return _append_int(column, value)
+
+
+def _append_number(column, value):
+    """Append value to an array column of ints or floats.
+       An int column is copied into a float column first if value is not a whole number.
+       :return: the column, which is a new array if it was copied
+    """
+    if column.typecode == 'q':
+        if value % 1 == 0:
+            column.append(int(value))
+            return column
+        column = array.array('d', column)
+    column.append(value)
+    return column
+
+
+class PooledNode(int):
+    """A lightweight handle for a node in a NodePool.
+       It has the same attributes as a SearchNode, so Frontiers can use either.
+       The handle is the node's index in the pool, as an int; each NodePool makes
+       its own subclass, which holds the pool, so a handle needs no other storage.
+       The state attribute is rebuilt every time it is used, so fetch it once per use.
+    """
+
+    __slots__ = ()
+    _pool = None
+
+    def __eq__(self, other):
+        """Two handles are equal if they are for the same node"""
+        return type(other) is type(self) and int(self) == int(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = int.__hash__
+
+    def __bool__(self):
+        """A handle is always true, even for node 0"""
+        return True
+
+    @property
+    def state(self):
+        """The node's State, rebuilt from the pool"""
+        return self._pool.state(self)
+
+    @property
+    def parent(self):
+        """A handle for the parent node, or None for the initial node"""
+        p = self._pool._parents[self]
+        if p < 0:
+            return None
+        return self._pool._handle(p)
+
+    @property
+    def depth(self):
+        return self._pool.depth(self)
+
+    @property
+    def path_cost(self):
+        return self._pool.path_cost(self)
+
+    def __str__(self):
+        """ Create and return a string representation of the object"""
+        return '<{}> {} ({})'.format(str(self.depth), str(self.state), str(self.path_cost))
+
+    display_steps = SearchNode.display_steps
+
+
 class SearchTerminationRecord(object):
     """A record to return information about how the search turned out.
        All the details are provided in a record, to avoid needing to print out the details
        at different parts of the code.
     """
 
-    def __init__(self, success=False, result=None, time=0, nodes=0, space=0, cutoff=False):
+    def __init__(self, success=False, result=None, time=0, nodes=0, space=0, cutoff=False, stats=None):
         self.success = success  # Boolean: True if a solution was found
         self.result = result    # SearchNode: a node containing a goal state, or None if no solution found
+                                # (BeamSearch instead returns the best node it found)
         self.time = time        # float: time was spent searching.  Not scientifically accurate, but good enough for fun
         self.nodes = nodes      # integer: number of nodes expanded during the search
         self.space = space      # integer: maximum size of the frontier during search
         self.cutoff = cutoff    # Boolean: For IDS, True if depth limited search reach the depth limit before failing
+        self.stats = stats      # SearchStats: a breakdown of the search, if it was instrumented; else None
 
     def __str__(self):
         """Create a string representation of the Result data
@@ -111,20 +317,73 @@ class SearchTerminationRecord(object):
         return text.format(textsuccess, str(self.time), str(self.nodes), str(self.space))
 
 
+class SearchStats(object):
+    """Counts and timings from an instrumented search; see Search(..., instrument=True).
+       Times are in seconds.  The time in result() includes the time in calc_h(),
+       so the difference between them is the cost of creating the States.
+    """
+
+    def __init__(self):
+        self.goal_tests = 0         # integer: States tested with is_goal()
+        self.expanded = 0           # integer: Nodes whose children were generated
+        self.generated = 0          # integer: child States created
+        self.adds = 0               # integer: calls to Frontier.add()
+        self.removes = 0            # integer: calls to Frontier.remove()
+        self.pruned = 0             # integer: Nodes the Frontier discarded (see Frontier.pruned)
+        self.result_time = 0.0      # float: time in result()
+        self.calc_h_time = 0.0      # float: time computing heuristic values, if the problem has them
+        self.add_time = 0.0         # float: time in Frontier.add()
+        self.remove_time = 0.0      # float: time in Frontier.remove()
+
+    def add(self, other):
+        """Add the counts and times from another SearchStats, e.g., for another iteration of IDS"""
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def __str__(self):
+        """Create a string representation, one line per count or time"""
+        return '\n'.join('{}: {}'.format(name, value) for name, value in vars(self).items())
+
+
+def _timed(function, stats, count_name, time_name):
+    """Return a version of function that counts its calls, and adds up the time they take, in stats.
+       :param count_name: the SearchStats attribute to count the calls in
+       :param time_name: the SearchStats attribute to add the time to, or None to only count
+    """
+    clock = time.perf_counter
+
+    def timed(*args):
+        setattr(stats, count_name, getattr(stats, count_name) + 1)
+        if time_name is None:
+            return function(*args)
+        start = clock()
+        try:
+            return function(*args)
+        finally:
+            setattr(stats, time_name, getattr(stats, time_name) + clock() - start)
+
+    return timed
+
+
 class Search(object):
     """A class to contain uninformed search algorithms.
        API users should call the public methods.
        Subclasses inheriting this class can call _treeSearch() or _dltree_search()
     """
 
-    def __init__(self, problem, timelimit=10):
+    def __init__(self, problem, timelimit=10, node_pool=False, instrument=False):
         """The Search object needs to be given:
             the search Problem
             an optional timelime (default set above)
+            optionally, node_pool=True to store nodes in a NodePool instead of SearchNodes,
+                which uses much less memory (the Problem must support encode_state() and decode_state())
+            optionally, instrument=True to count and time the parts of each search (see SearchStats)
         """
         self._problem = problem
         self._frontier = None
         self._time_limit = timelimit
+        self._node_pool = node_pool
+        self._instrument = instrument
 
 
     def _tree_search(self, initial_state):
@@ -134,36 +393,74 @@ class Search(object):
                 time so as not to exceed a time limit.
                 number of nodes expanded
                 size of the frontier at any point
+           With instrument=True, the search also counts and times its parts, and the
+           record's stats attribute holds the SearchStats.  The time in calc_h() is
+           measured by the Problem, if it has a stats attribute (see coloredTiles.InformedProblem).
         """
-
-        start_time = time.time()
-        now = start_time
-        self._frontier.add(SearchNode(initial_state, None))
-        node_counter = 0
-        max_space = 0
-
-        # keep searching if there are nodes in the Frontier, and time left before the limit
-        while not self._frontier.is_empty() and now - start_time < self._time_limit:
-            max_space = max(max_space, len(self._frontier))
-            this_node = self._frontier.remove()
-            node_counter += 1
-            now = time.time()
-            if self._problem.is_goal(this_node.state):
-                # Jeffnote, 2020-07-28: I started getting division-by-zero with time - was the search too fast?
-
-                return SearchTerminationRecord(success=True, result=this_node,
-                                    nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+        problem = self._problem
+        frontier = self._frontier
+        if self._node_pool:
+            make_node = NodePool(problem).add
+        else:
+            make_node = SearchNode
+
+        # the loop calls these; with instrument=True, they are replaced by timed versions
+        is_goal = problem.is_goal
+        result = problem.result
+        add = frontier.add
+        remove = frontier.remove
+        stats = None
+        if self._instrument:
+            stats = SearchStats()
+            is_goal = _timed(is_goal, stats, 'goal_tests', None)
+            result = _timed(result, stats, 'generated', 'result_time')
+            add = _timed(add, stats, 'adds', 'add_time')
+            remove = _timed(remove, stats, 'removes', 'remove_time')
+            pruned = frontier.pruned
+            problem_stats = getattr(problem, 'stats', None)
+            if hasattr(problem, 'stats'):
+                problem.stats = stats
+
+        try:
+            start_time = time.time()
+            now = start_time
+            add(make_node(initial_state, None))
+            node_counter = 0
+            max_space = 0
+            success = False
+            this_node = None
+
+            # keep searching if there are nodes in the Frontier, and time left before the limit
+            while not frontier.is_empty() and now - start_time < self._time_limit:
+                max_space = max(max_space, len(frontier))
+                this_node = remove()
+                this_state = this_node.state
+                node_counter += 1
+                now = time.time()
+                if is_goal(this_state):
+                    success = True
+                    break
+                else:
+                    for act in problem.actions(this_state):
+                        child = result(this_state, act)
+                        add(make_node(child, this_node))
             else:
-                for act in self._problem.actions(this_node.state):
-                    child = self._problem.result(this_node.state, act)
-                    self._frontier.add(SearchNode(child, this_node))
+                # didn't find a solution!
+                now = time.time()
+                this_node = None
+        finally:
+            if stats is not None and hasattr(problem, 'stats'):
+                problem.stats = problem_stats
+
+        if stats is not None:
+            # every node tested but the goal was expanded
+            stats.expanded = stats.goal_tests - success
+            stats.pruned = frontier.pruned - pruned
 
-        # didn't find a solution!
-        now = time.time()
         # Jeffnote, 2020-07-28: I started getting division-by-zero with time - was the search too fast?
-
-        return SearchTerminationRecord(success=False, result=None,
-                            nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+        return SearchTerminationRecord(success=success, result=this_node,
+                            nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001),
+                            stats=stats)
 
 
     def DepthFirstSearch(self, initial_state, search_type):
@@ -172,7 +469,8 @@ class Search(object):
         starting at a given initial state.
         :param initial_state: a Problem State
         :param search_type: either "tree" or "graph" to determine whether 
-                            treesearch or graphsearch should be used
+                            treesearch or graphsearch should be used,
+                            or "closed" for graph search with a closed set of states
         :return: SearchTerminationRecord
         """
         # configure search: for DFS, we want the Frotnier with the LIFO Stack
@@ -180,6 +478,8 @@ class Search(object):
             self._frontier = Frontiers.FrontierLIFO()
         elif search_type == "graph":
             self._frontier = Frontiers.GFrontierLIFO()
+        elif search_type == "closed":
+            self._frontier = Frontiers.CFrontierLIFO()
 
         # run search
         return self._tree_search(initial_state)
@@ -190,7 +490,8 @@ class Search(object):
         starting at a given initial state.
         :param initial_state: a Problem State
         :param search_type: either "tree" or "graph" to determine whether 
-                            treesearch or graphsearch should be used
+                            treesearch or graphsearch should be used,
+                            or "closed" for graph search with a closed set of states
         :return: SearchTerminationRecord
         """
         # configure search: for BFS, we want the Frontier with the FIFO Queue
@@ -198,18 +499,24 @@ class Search(object):
             self._frontier = Frontiers.FrontierFIFO()
         elif search_type == "graph":
             self._frontier = Frontiers.GFrontierFIFO()
+        elif search_type == "closed":
+            self._frontier = Frontiers.CFrontierFIFO()
 
         # run search
         return self._tree_search(initial_state)
 
-    def DepthLimitedSearch(self, initial_state, limit, search_type):
+    def DepthLimitedSearch(self, initial_state, limit, search_type, table=None):
         """
         Perform depth-limited search of the problem,
         starting at a given initial state.
         :param initial_state: a Problem State
         :param limit: the maximum allowable depth
                     search_type: either "tree" or "graph" to determine whether 
-                            treesearch or graphsearch should be used
+                            treesearch or graphsearch should be used,
+                            or "closed" for graph search with a closed set of states,
+                            or "table" for graph search with a bounded transposition table
+        :param table: for search_type "table", the Frontiers.TranspositionTable to use;
+                      if None, a new one of size TABLE_SIZE
         :return: SearchTerminationRecord
         """
         # configure search: We want the FIFO Frontier with the depth limit
@@ -219,6 +526,12 @@ class Search(object):
             self._frontier = Frontiers.FrontierLIFO_DL(limit)
         elif search_type == "graph":
             self._frontier = Frontiers.GFrontierLIFO_DL(limit)
+        elif search_type == "closed":
+            self._frontier = Frontiers.CFrontierLIFO_DL(limit)
+        elif search_type == "table":
+            if table is None:
+                table = Frontiers.TranspositionTable(TABLE_SIZE)
+            self._frontier = Frontiers.TFrontierLIFO_DL(limit, table)
 
 
         # run search
@@ -231,32 +544,136 @@ class Search(object):
         result.cutoff = self._frontier._cutoff
         return result
 
-    def IDS(self, initial_state, search_type):
+    def IDS(self, initial_state, search_type, table_size=None):
         """Iterative deepening Search successively increases the search depth
            the search depth until a solution is found.
            :param search_type: either "tree" or "graph" to determine whether 
-                            treesearch or graphsearch should be used
+                            treesearch or graphsearch should be used,
+                            or "closed" for graph search with a closed set of states,
+                            or "table" for graph search with a transposition table that is kept
+                            from one iteration to the next, so states reached more deeply than
+                            in an earlier iteration are not searched again
+           :param table_size: for search_type "table", the most states the table may hold
+                              (TABLE_SIZE if None)
            :return: SearchTerminationRecord
                             """
+        table = None
+        if search_type == "table":
+            table = Frontiers.TranspositionTable(table_size if table_size is not None else TABLE_SIZE)
         limit = 0
         nodes = 0
         time = 0
         space = 0
+        # with instrument=True, the stats of all the iterations are added up
+        stats = SearchStats() if self._instrument else None
         while time < self._time_limit:
-            answer = self.DepthLimitedSearch(initial_state, limit, search_type)
+            if table is not None:
+                table.next_iteration()
+            answer = self.DepthLimitedSearch(initial_state, limit, search_type, table)
+            if stats is not None:
+                stats.add(answer.stats)
             if answer.success:
                 answer.time += time
                 answer.nodes += nodes
                 answer.space = max(answer.space, space)
+                answer.stats = stats
                 return answer
             elif not self._frontier._cutoff:
-                return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time)
+                return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time,
+                                               stats=stats)
             else:
                 nodes += answer.nodes
                 time += answer.time    # this could result in search that is substantial longer than the limit
                 limit += 1
                 space = max(answer.space, space)
 
-        return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time)
+        return SearchTerminationRecord(success=False, result=None, nodes=nodes, space=space, time=time, stats=stats)
+
+    def BidirectionalSearch(self, initial_state):
+        """
+        Perform bidirectional breadth-first search of the problem,
+        from the given initial state and from the problem's goal_state at the same time.
+        This assumes there is a single goal state, stored as Problem.goal_state,
+        and that every action undoes itself, so searching backwards from the goal
+        uses the same actions() and result() as searching forwards.
+        Each direction keeps a table of the states it has reached, keyed by
+        Problem.encode_state(), and the search stops when the two meet.
+        (State.key() is not used, because it may treat symmetric states as one, and
+        the two halves can only be joined at the very same state.)
+        :param initial_state: a Problem State
+        :return: SearchTerminationRecord
+        """
+        start_time = time.time()
+        now = start_time
+        goal_state = self._problem.goal_state
+        node_counter = 0
+        max_space = 0
+
+        start = SearchNode(initial_state, None)
+        if self._problem.is_goal(initial_state):
+            return SearchTerminationRecord(success=True, result=start, nodes=1, space=1, time=0.00001)
+
+        # for each direction: the nodes on the current layer, and all the states seen so far
+        forward = [start]
+        encode = self._problem.encode_state
+        forward_seen = {encode(initial_state): start}
+        backward = [SearchNode(goal_state, None)]
+        backward_seen = {encode(goal_state): backward[0]}
+
+        while forward and backward and now - start_time < self._time_limit:
+            max_space = max(max_space, len(forward) + len(backward))
+            # expand a whole layer of the smaller side, so the first meeting is a shortest path
+            if len(forward) <= len(backward):
+                layer, seen, other_seen = forward, forward_seen, backward_seen
+            else:
+                layer, seen, other_seen = backward, backward_seen, forward_seen
+
+            next_layer = []
+            best = None
+            for this_node in layer:
+                node_counter += 1
+                for act in self._problem.actions(this_node.state):
+                    child = SearchNode(self._problem.result(this_node.state, act), this_node)
+                    key = encode(child.state)
+                    if key in seen:
+                        continue
+                    seen[key] = child
+                    next_layer.append(child)
+                    if key in other_seen:
+                        meet = other_seen[key]
+                        if best is None or child.depth + meet.depth < best[0].depth + best[1].depth:
+                            best = (child, meet)
+            now = time.time()
+
+            if best is not None:
+                if layer is forward:
+                    result = self._join(best[0], best[1])
+                else:
+                    result = self._join(best[1], best[0])
+                return SearchTerminationRecord(success=True, result=result,
+                                    nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+
+            if layer is forward:
+                forward = next_layer
+            else:
+                backward = next_layer
+
+        # didn't find a solution!
+        now = time.time()
+        return SearchTerminationRecord(success=False, result=None,
+                            nodes=node_counter, space=max_space, time=max(now - start_time, 0.00001))
+
+    def _join(self, forward_node, backward_node):
+        """Join the two halves of a bidirectional search into one chain of SearchNodes
+           from the initial state to the goal state.
+           Walking up the backward half, each state's action takes it back to its parent,
+           so we apply those actions to extend the forward half.
+        """
+        node = forward_node
+        while backward_node.parent is not None:
+            child = self._problem.result(node.state, backward_node.state.action)
+            node = SearchNode(child, node)
+            backward_node = backward_node.parent
+        return node
 
 # end of file
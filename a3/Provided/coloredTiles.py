@@ -14,6 +14,13 @@
 
 import random as rand
 import math as math
+import time as time
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional; without it, the batch methods of BitProblem work on plain lists
+    np = None
 
 class State(object):
     """The Problem State is an array of Boolean values, which we represent by a nested list.  True means a green tile, False a red tile.
@@ -39,7 +46,12 @@ class State(object):
         """ Defining this function allows states to be compared
         using the == operator """        
         return self.puzzle == other.puzzle   
-        
+
+    def key(self):
+        """ Return a hashable value identifying this state,
+        for use in the closed set of graph search """
+        return pack_puzzle(self.puzzle)
+
     def touch(self, x, y):
         """ touchs the grid at location (x, y), flipping the color of that
         space and all adjacent spaces"""
@@ -78,6 +90,22 @@ class InformedState(State):
         self.hval = hval
 
 
+# Canonical ordering of touches.
+# Touches commute, and touching a tile twice undoes it, so a shortest solution is a set
+# of distinct tiles, and the order they are touched in does not matter.  In ordered mode
+# a state may only be followed by touches that come after its own action in the list
+# of actions, so each set of touches is generated once, in increasing order, instead of
+# once per permutation.  The depth of any path is at most nrows*ncols.
+# Each set is reached by one path only, so ordered mode is for tree search
+# (DFS, DLS, IDS, A*, IDA*); a closed set would throw away paths that are still needed.
+
+def ordered_actions(actions):
+    """ Return a dict mapping each action to the list of actions after it.
+        States created by any other action (the initial state) are not in the dict.
+    """
+    return {a: actions[i+1:] for i, a in enumerate(actions)}
+
+
 class Problem(object):
     """The Problem class defines aspects of the problem.
        One of the important definitions is the transition model for states.
@@ -88,13 +116,14 @@ class Problem(object):
 
     """
 
-    def __init__(self, nrows, ncols, start=None):
+    def __init__(self, nrows, ncols, start=None, ordered=False):
         """ The problem is defined by an initial grid of tiles.
         It is assumed the goal state is an all-green grid.
 
             :param nrows: number of rows in the tile puzzle
             :param ncols: number of columns in the tile puzzle
             :param start: a list of strings where each character is R or G.  Each string represents one row of the grid
+            :param ordered: if True, touches are only generated in increasing order (see ordered_actions)
         """
         self.nrows = nrows
         self.ncols = ncols
@@ -118,7 +147,8 @@ class Problem(object):
                 # actions are just a coordinate pair for the square being touched
                 a = (r, c)
                 self.actions_cache.append(a)  # left
-            
+        self.ordered = ordered
+        self.actions_after = ordered_actions(self.actions_cache)
 
     def create_initial_state(self):
         """ returns an initial state.
@@ -130,15 +160,37 @@ class Problem(object):
         """The target value is stored in the Problem instance."""
         return a_state == self.goal_state
 
+    def objective_function(self, a_state:State):
+        """ The number of red tiles; 0 for the goal.  Used to rank states that are not the goal,
+            e.g., by InformedSearch.BeamSearch() to report the best state it found.
+        """
+        count = 0
+        for row in a_state.puzzle:
+            for col in row:
+                if not col:
+                    count += 1
+        return count
+
     def actions(self, a_state:State):
         """ Returns all the actions that are legal in the given state.
             An action is a tuple representing a coordinate pair
             of the tile being touched to toggle its color.
             The actions are the same in every state, so we can just return the same
-            list of actions every time rather than re-building it
+            list of actions every time rather than re-building it.
+            In ordered mode, only the actions after the one that created the state are returned.
         """
+        if self.ordered:
+            return self.actions_after.get(a_state.action, self.actions_cache)
         return self.actions_cache
 
+    def encode_state(self, a_state:State):
+        """ Return the state packed into an int, for compact storage (see UninformedSearch.NodePool) """
+        return pack_puzzle(a_state.puzzle)
+
+    def decode_state(self, code):
+        """ Return the State for an int returned by encode_state() """
+        return State(unpack_puzzle(code, self.nrows, self.ncols))
+
     def result(self, a_state:State, an_action):
         """Given a state and an action, return the resulting state.
            An action is a tuple representing a coordinate pair
@@ -154,15 +206,16 @@ class Problem(object):
 class InformedProblem(Problem):
     """We add the ability to calculate an estimate to the goal state.
     """
-    def __init__(self, nrows, ncols, start=None):
+    def __init__(self, nrows, ncols, start=None, ordered=False):
         """ The problem is defined by an initial grid of tiles.
         It is assumed the goal state is an all-green grid.
 
             :param nrows: number of rows in the tile puzzle
             :param ncols: number of columns in the tile puzzle
             :param start: a list of strings where each character is R or G.  Each string represents one row of the grid
+            :param ordered: if True, touches are only generated in increasing order (see Problem)
         """
-        super().__init__(nrows, ncols, start)
+        super().__init__(nrows, ncols, start, ordered)
 
     def create_initial_state(self):
         """ returns an initial state.
@@ -172,19 +225,50 @@ class InformedProblem(Problem):
         hval = self.calc_h(self.init_state.puzzle)
         return InformedState(self.init_state.puzzle, hval)
 
+    def decode_state(self, code):
+        """ Return the InformedState for an int returned by encode_state().
+            The hval is left at 0; NodePool stores it separately.
+        """
+        return InformedState(unpack_puzzle(code, self.nrows, self.ncols))
+
+    # A subclass sets incremental_h to True if it implements calc_h_delta().
+    # Then result() updates the parent's hval from the few tiles a touch changes,
+    # instead of calling calc_h() on the whole grid.
+    incremental_h = False
+
+    # An instrumented search sets stats to its SearchStats while it runs (see UninformedSearch),
+    # and result() adds the time spent computing hvals to stats.calc_h_time.
+    stats = None
+
     def calc_h(self, puzzle):
         """This function computes the heuristic function h(n)
         """
         # this trivial version returns 0, a trivial estimate, but consistent and admissible
         return 0
 
+    def calc_h_delta(self, parent_state, new_state, an_action):
+        """This function computes h(n) for new_state, the result of doing an_action in parent_state.
+           Only the tiles touched by an_action differ from the parent, so an incremental
+           heuristic can update parent_state.hval by looking at those tiles alone.
+           This version just calls calc_h() on the whole grid.
+        """
+        return self.calc_h(new_state.puzzle)
+
     def result(self, a_state, an_action):
         """Given a state and an action, return the resulting state.
            The super class does most of the work.
            We add the heuristic value to the informed state here.
         """
         astate = super().result(a_state, an_action)
-        astate.hval = self.calc_h(astate.puzzle)
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+        if self.incremental_h:
+            astate.hval = self.calc_h_delta(a_state, astate, an_action)
+        else:
+            astate.hval = self.calc_h(astate.puzzle)
+        if stats is not None:
+            stats.calc_h_time += time.perf_counter() - start
         return astate
 
 
@@ -223,8 +307,527 @@ class InformedProblemV2(InformedProblem):
     def calc_h(self, puzzle):
         #TODO: Implement a non-admissible heuristic
         return 0
- 
-            
-            
+
+
+class InformedProblemReds(InformedProblem):
+    """ This version counts red tiles, an admissible heuristic that is updated incrementally.
+        A touch turns at most 5 tiles green, so at least reds/5 touches are needed.
+        The hval is reds/5 (not rounded up), so the red count can be recovered from the parent's hval,
+        and each child costs one look at the 5 or fewer touched tiles.
+    """
+    incremental_h = True
+
+    def __init__(self, nrows, ncols, start=None, ordered=False):
+        """ The problem is defined by an initial grid of tiles.
+        It is assumed the goal state is an all-green grid.
+
+            :param nrows: number of rows in the tile puzzle
+            :param ncols: number of columns in the tile puzzle
+            :param start: a list of strings where each character is R or G.  Each string represents one row of the grid
+            :param ordered: if True, touches are only generated in increasing order (see Problem)
+        """
+        super().__init__(nrows, ncols, start, ordered)
+        # the tiles flipped by each action
+        self.touched = {}
+        for (r, c) in self.actions_cache:
+            self.touched[(r, c)] = [(i, j) for (i, j) in [(r, c), (r-1, c), (r+1, c), (r, c-1), (r, c+1)]
+                                    if 0 <= i < nrows and 0 <= j < ncols]
+
+    def calc_h(self, puzzle):
+        """The number of red tiles, divided by 5"""
+        reds = 0
+        for row in puzzle:
+            for col in row:
+                if not col:
+                    reds += 1
+        return reds / 5
+
+    def calc_h_delta(self, parent_state, new_state, an_action):
+        """Update the parent's red count from the touched tiles only"""
+        reds = round(parent_state.hval * 5)
+        for (r, c) in self.touched[an_action]:
+            if new_state.puzzle[r][c]:
+                reds -= 1
+            else:
+                reds += 1
+        return reds / 5
+
+
+class InformedProblemPDB(InformedProblem):
+    """ This version uses pattern databases, an admissible heuristic.
+        See PatternDatabase.py.
+    """
+    def __init__(self, nrows, ncols, start=None, ordered=False):
+        """ The problem is defined by an initial grid of tiles.
+        It is assumed the goal state is an all-green grid.
+        The pattern databases for this grid size are loaded (or built, the first time).
+
+            :param nrows: number of rows in the tile puzzle
+            :param ncols: number of columns in the tile puzzle
+            :param start: a list of strings where each character is R or G.  Each string represents one row of the grid
+            :param ordered: if True, touches are only generated in increasing order (see Problem)
+        """
+        # imported here, not at the top: PatternDatabase imports this module
+        import PatternDatabase as PDB
+        self.pdb = PDB.load(nrows, ncols)
+        super().__init__(nrows, ncols, start, ordered)
+
+    def calc_h(self, puzzle):
+        """The largest cost over the row bands of the grid"""
+        return self.pdb.h(pack_puzzle(puzzle))
+
+
+# Bitboard versions of the model.
+# The grid is packed into a single int: bit (r*ncols + c) is set when the tile
+# at row r, column c is RED.  The goal (all green) is therefore the int 0, and
+# touching a tile is a single XOR with a mask that is computed once per grid size.
+
+_touch_mask_cache = {}
+
+def touch_masks(nrows, ncols):
+    """ Return the list of XOR masks for a grid of the given size.
+        Entry r*ncols + c is the mask for touching the tile at (r, c).
+        The masks depend only on the dimensions, so they are cached.
+    """
+    key = (nrows, ncols)
+    if key not in _touch_mask_cache:
+        masks = []
+        for r in range(nrows):
+            for c in range(ncols):
+                m = 1 << (r*ncols + c)
+                if r-1 >= 0:
+                    m |= 1 << ((r-1)*ncols + c)
+                if r+1 < nrows:
+                    m |= 1 << ((r+1)*ncols + c)
+                if c-1 >= 0:
+                    m |= 1 << (r*ncols + c-1)
+                if c+1 < ncols:
+                    m |= 1 << (r*ncols + c+1)
+                masks.append(m)
+        _touch_mask_cache[key] = masks
+    return _touch_mask_cache[key]
+
+
+def pack_puzzle(puzzle):
+    """ Convert a nested list of booleans (True is green) into the packed int form """
+    bits = 0
+    ncols = len(puzzle[0])
+    for r, row in enumerate(puzzle):
+        for c, col in enumerate(row):
+            if not col:
+                bits |= 1 << (r*ncols + c)
+    return bits
+
+
+def unpack_puzzle(bits, nrows, ncols):
+    """ Convert the packed int form back into a nested list of booleans (True is green) """
+    return [[not (bits >> (r*ncols + c)) & 1 for c in range(ncols)] for r in range(nrows)]
+
+
+# the number of set bits in each byte value, for counting the bits of a whole array at once
+_BYTE_BITS = np.array([bin(v).count('1') for v in range(256)], dtype=np.uint8) if np is not None else None
+
+def popcounts(grids):
+    """ Return the number of set bits (red tiles) in each packed grid of a NumPy uint64 array """
+    counts = _BYTE_BITS[np.ascontiguousarray(grids).view(np.uint8)]
+    return counts.reshape(grids.shape + (8,)).sum(axis=-1)
+
+
+# Symmetry of grids.
+# Rotating or reflecting a grid does not change how hard it is to solve:
+# touching the rotated tiles solves the rotated grid.  There are 8 such transforms
+# (the dihedral group), numbered as follows, each mapping tile (r, c) of an
+# nrows x ncols grid to a new tile:
+#   0: identity (r, c)                      4: mirror left-right (r, ncols-1-c)
+#   1: rotate 90 (c, nrows-1-r)             5: mirror top-bottom (nrows-1-r, c)
+#   2: rotate 180                           6: transpose (c, r)
+#   3: rotate 270 (ncols-1-c, r)            7: anti-transpose (ncols-1-c, nrows-1-r)
+# Transforms 1, 3, 6 and 7 swap rows and columns, so a grid that is not square
+# only keeps its shape under the other 4.
+# The canonical key of a grid is the smallest packed int among its transforms
+# (of the same shape), so symmetric grids have the same canonical key.
+
+# the transform that undoes each transform
+INVERSE_TRANSFORM = [0, 3, 2, 1, 4, 5, 6, 7]
+# the transforms that keep an nrows x ncols grid nrows x ncols
+SHAPE_PRESERVING = [0, 2, 4, 5]
+
+def transform_cell(r, c, t, nrows, ncols=None):
+    """ Return the tile that (r, c) moves to under transform t of an nrows x ncols grid
+        (square, if ncols is not given)
+    """
+    if ncols is None:
+        ncols = nrows
+    if t == 0:
+        return (r, c)
+    elif t == 1:
+        return (c, nrows-1-r)
+    elif t == 2:
+        return (nrows-1-r, ncols-1-c)
+    elif t == 3:
+        return (ncols-1-c, r)
+    elif t == 4:
+        return (r, ncols-1-c)
+    elif t == 5:
+        return (nrows-1-r, c)
+    elif t == 6:
+        return (c, r)
+    else:
+        return (ncols-1-c, nrows-1-r)
+
+
+_transform_table_cache = {}
+
+def _transform_tables(nrows, ncols):
+    """ Return lookup tables for transforming packed nrows x ncols grids.
+        Entry [t][k][v] is the transformed bits for byte value v at byte k of the grid,
+        so a grid is transformed with one lookup per byte instead of one step per tile.
+    """
+    if (nrows, ncols) not in _transform_table_cache:
+        size = nrows*ncols
+        nbytes = (size + 7) // 8
+        tables = []
+        for t in range(8):
+            # where each tile's bit goes; the transformed grid is ncols wide, or nrows if t swaps them
+            width = ncols if t in SHAPE_PRESERVING else nrows
+            dest = []
+            for i in range(size):
+                r, c = transform_cell(i // ncols, i % ncols, t, nrows, ncols)
+                dest.append(r*width + c)
+            per_byte = []
+            for k in range(nbytes):
+                table = [0] * 256
+                for v in range(256):
+                    out = 0
+                    for b in range(8):
+                        i = 8*k + b
+                        if v >> b & 1 and i < size:
+                            out |= 1 << dest[i]
+                    table[v] = out
+                per_byte.append(table)
+            tables.append(per_byte)
+        _transform_table_cache[nrows, ncols] = tables
+    return _transform_table_cache[nrows, ncols]
+
+
+def transform_bits(bits, t, nrows, ncols=None):
+    """ Return the packed nrows x ncols grid (square, if ncols is not given), transformed by transform t """
+    if ncols is None:
+        ncols = nrows
+    out = 0
+    for table in _transform_tables(nrows, ncols)[t]:
+        out |= table[bits & 255]
+        bits >>= 8
+    return out
+
+
+def canonical_form(bits, nrows, ncols=None):
+    """ Return (key, t): the canonical key of the packed nrows x ncols grid
+        (square, if ncols is not given), and the transform t that turns the grid into it.
+    """
+    if ncols is None:
+        ncols = nrows
+    transforms = range(8) if nrows == ncols else SHAPE_PRESERVING
+    best = bits
+    best_t = 0
+    for t in transforms:
+        other = transform_bits(bits, t, nrows, ncols)
+        if other < best:
+            best = other
+            best_t = t
+    return best, best_t
+
+
+def canonical_key(bits, nrows, ncols=None):
+    """ Return the canonical key of the packed nrows x ncols grid (square, if ncols is not given) """
+    return canonical_form(bits, nrows, ncols)[0]
+
+
+class BitState(object):
+    """The same Colored Tiles state as State, but the grid is packed into a single int.
+       Copying a BitState is just copying an int, and comparing or hashing
+       two BitStates is O(1).
+    """
+    __slots__ = ('action', 'bits', 'nrows', 'ncols', 'symmetric')
+
+    def __init__(self, bits, nrows, ncols, symmetric=False):
+        """
+        Initialize the BitState object.
+        :param bits: the packed grid; a set bit means a red tile
+        :param nrows: number of rows in the grid
+        :param ncols: number of columns in the grid
+        :param symmetric: if True, key() treats rotations and reflections of the grid as the same state
+        """
+        self.action = 'Initial state'
+        self.bits = bits
+        self.nrows = nrows
+        self.ncols = ncols
+        self.symmetric = symmetric
+
+    @property
+    def puzzle(self):
+        """ The grid as a nested list of booleans, for code that expects a State """
+        return unpack_puzzle(self.bits, self.nrows, self.ncols)
+
+    def __str__(self):
+        """ A string representation of the State """
+        return '<{}>'.format(str(self.puzzle))
+
+    def __eq__(self, other):
+        """ Defining this function allows states to be compared
+        using the == operator """
+        return self.bits == other.bits
+
+    def __hash__(self):
+        """ BitStates can be used in sets and as dictionary keys """
+        return hash(self.bits)
+
+    def key(self):
+        """ Return a hashable value identifying this state,
+        for use in the closed set of graph search.
+        For a symmetric state, this is the canonical key, shared by
+        all rotations and reflections of the grid. """
+        if self.symmetric:
+            return canonical_key(self.bits, self.nrows)
+        return self.bits
+
+    def touch(self, x, y):
+        """ touchs the grid at location (x, y), flipping the color of that
+        space and all adjacent spaces"""
+        self.bits ^= touch_masks(self.nrows, self.ncols)[x*self.ncols + y]
+
+    def display(self):
+        """ display state in more human readable format
+        """
+        for row in self.puzzle:
+            line = ""
+            for col in row:
+                if col:
+                    line += "G"
+                else:
+                    line += "R"
+            print(line)
+
+
+class InformedBitState(BitState):
+    """A BitState with a place to store the estimated path cost to the goal state.
+    """
+    __slots__ = ('hval',)
+
+    def __init__(self, bits, nrows, ncols, hval=0, symmetric=False):
+        """Initialize the State.
+           The hval attribute estimates the path cost to the goal state from the current state
+           It should be calculated by the InformedBitProblem class, and stored here for use.
+        """
+        super().__init__(bits, nrows, ncols, symmetric)
+        self.hval = hval
+
+
+class BitProblem(object):
+    """The Colored Tiles problem, using BitStates.
+       It has the same interface as Problem, so it can be given to any of the Search classes:
+            is_goal(s): returns true if the state is the goal state.
+            actions(s): returns a list of all legal actions in state s
+            result(s,a): returns a new state, the result of doing action a in state s
+    """
+
+    def __init__(self, nrows, ncols, start=None, symmetry=False, ordered=False):
+        """ The problem is defined by an initial grid of tiles.
+        It is assumed the goal state is an all-green grid.
+
+            :param nrows: number of rows in the tile puzzle
+            :param ncols: number of columns in the tile puzzle
+            :param start: a list of strings where each character is R or G.  Each string represents one row of the grid
+            :param symmetry: if True, graph search with a closed set treats rotations and reflections
+                             of a grid as the same state.  Only for square grids.
+                             The goal is symmetric, so no solutions are lost.
+            :param ordered: if True, touches are only generated in increasing order (see ordered_actions).
+                            Not for use with a closed set.
+        """
+        if symmetry and nrows != ncols:
+            raise ValueError('symmetry reduction needs a square grid')
+        self.nrows = nrows
+        self.ncols = ncols
+        self.symmetry = symmetry
+        if start is not None:
+            self.init_state = BitState(pack_puzzle([[col=="G" for col in row] for row in start]), nrows, ncols, symmetry)
+        self.goal_state = BitState(0, nrows, ncols, symmetry)
+
+        # legal actions based only on dimensions, so cache actions and their masks in advance
+        self.actions_cache = []
+        self.masks = {}
+        masks = touch_masks(nrows, ncols)
+        for r in range(self.nrows):
+            for c in range(self.ncols):
+                a = (r, c)
+                self.actions_cache.append(a)
+                self.masks[a] = masks[r*ncols + c]
+        self.ordered = ordered
+        self.actions_after = ordered_actions(self.actions_cache)
+        # the masks again, as one array, for expand_batch(); only with NumPy, and grids of at most 64 tiles
+        if np is not None and nrows*ncols <= 64:
+            self.mask_array = np.array([self.masks[a] for a in self.actions_cache], dtype=np.uint64)
+        else:
+            self.mask_array = None
+
+    def create_initial_state(self):
+        """ returns an initial state.
+            Here, we return the stored initial state.
+        """
+        return self.init_state
+
+    def is_goal(self, a_state:BitState):
+        """The goal is the all-green grid, which packs to 0."""
+        return a_state.bits == 0
+
+    def objective_function(self, a_state:BitState):
+        """ The number of red tiles, as in Problem """
+        return a_state.bits.bit_count()
+
+    def actions(self, a_state:BitState):
+        """ Returns all the actions that are legal in the given state.
+            The actions are the same in every state, so the cached list is returned.
+            In ordered mode, only the actions after the one that created the state are returned.
+        """
+        if self.ordered:
+            return self.actions_after.get(a_state.action, self.actions_cache)
+        return self.actions_cache
+
+    def encode_state(self, a_state:BitState):
+        """ Return the state packed into an int, for compact storage (see UninformedSearch.NodePool) """
+        return a_state.bits
+
+    def decode_state(self, code):
+        """ Return the BitState for an int returned by encode_state() """
+        return BitState(code, self.nrows, self.ncols, self.symmetry)
+
+    def result(self, a_state:BitState, an_action):
+        """Given a state and an action, return the resulting state.
+           Touching a tile is a single XOR with the precomputed mask.
+        """
+        new_state = BitState(a_state.bits ^ self.masks[an_action], self.nrows, self.ncols, self.symmetry)
+        new_state.action = an_action
+        return new_state
+
+
+    def expand_batch(self, parents):
+        """ Expand a batch of packed grids, for every action in actions_cache, all at once.
+            The ordered and symmetry options are not used here.
+            :param parents: a sequence of packed grids
+            :return: (children, goals): children[i][j] is the packed grid made by doing
+                     actions_cache[j] in parents[i], and goals[i][j] is True if it is the goal.
+                     With NumPy, both are 2-d arrays, each made in one step; without it,
+                     they are lists of lists.
+        """
+        if self.mask_array is not None:
+            children = np.asarray(parents, dtype=np.uint64)[:, None] ^ self.mask_array
+            return children, children == 0
+        masks = [self.masks[a] for a in self.actions_cache]
+        children = [[bits ^ m for m in masks] for bits in parents]
+        return children, [[bits == 0 for bits in row] for row in children]
+
+class InformedBitProblem(BitProblem):
+    """We add the ability to calculate an estimate to the goal state.
+       Unlike InformedProblem, calc_h() is given the packed grid, not a nested list.
+    """
+    def __init__(self, nrows, ncols, start=None, symmetry=False, ordered=False):
+        """ The problem is defined by an initial grid of tiles.
+        It is assumed the goal state is an all-green grid.
+
+            :param nrows: number of rows in the tile puzzle
+            :param ncols: number of columns in the tile puzzle
+            :param start: a list of strings where each character is R or G.  Each string represents one row of the grid
+            :param symmetry: if True, rotations and reflections of a grid are the same state (see BitProblem)
+            :param ordered: if True, touches are only generated in increasing order (see BitProblem)
+        """
+        super().__init__(nrows, ncols, start, symmetry, ordered)
+
+    def create_initial_state(self):
+        """ returns an initial state, with its hval calculated.
+        """
+        hval = self.calc_h(self.init_state.bits)
+        return InformedBitState(self.init_state.bits, self.nrows, self.ncols, hval, self.symmetry)
+
+    def decode_state(self, code):
+        """ Return the InformedBitState for an int returned by encode_state().
+            The hval is left at 0; NodePool stores it separately.
+        """
+        return InformedBitState(code, self.nrows, self.ncols, symmetric=self.symmetry)
+
+    # incremental heuristics, and timing by an instrumented search, as in InformedProblem
+    incremental_h = False
+    stats = None
+
+    def calc_h(self, bits):
+        """This function computes the heuristic function h(n) from the packed grid
+        """
+        # this trivial version returns 0, a trivial estimate, but consistent and admissible
+        return 0
+
+    def calc_h_delta(self, parent_state, new_state, an_action):
+        """This function computes h(n) for new_state, the result of doing an_action in parent_state.
+           This version just calls calc_h() on the whole grid (see InformedProblem).
+        """
+        return self.calc_h(new_state.bits)
+
+    def result(self, a_state, an_action):
+        """Given a state and an action, return the resulting state,
+           with the heuristic value stored in it.
+        """
+        bits = a_state.bits ^ self.masks[an_action]
+        new_state = InformedBitState(bits, self.nrows, self.ncols, 0, self.symmetry)
+        new_state.action = an_action
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+        if self.incremental_h:
+            new_state.hval = self.calc_h_delta(a_state, new_state, an_action)
+        else:
+            new_state.hval = self.calc_h(bits)
+        if stats is not None:
+            stats.calc_h_time += time.perf_counter() - start
+        return new_state
+
+
+    def calc_h_batch(self, children):
+        """This function computes h(n) for a batch of packed grids from expand_batch().
+           This version calls calc_h() on each one; a subclass can do the whole batch at once.
+        """
+        if np is not None and isinstance(children, np.ndarray):
+            hvals = [self.calc_h(bits) for bits in children.ravel().tolist()]
+            return np.array(hvals, dtype=float).reshape(children.shape)
+        return [[self.calc_h(bits) for bits in row] for row in children]
+
+    def expand_batch(self, parents):
+        """ Expand a batch of packed grids, as in BitProblem.
+            :return: (children, goals, hvals): as in BitProblem, and the heuristic value of each child
+        """
+        children, goals = super().expand_batch(parents)
+        return children, goals, self.calc_h_batch(children)
+
+class InformedBitProblemReds(InformedBitProblem):
+    """ Red tiles divided by 5, as in InformedProblemReds, on the packed grid.
+        The change in the red count is two popcounts of the touched tiles.
+    """
+    incremental_h = True
+
+    def calc_h(self, bits):
+        """The number of red tiles, divided by 5"""
+        return bits.bit_count() / 5
+
+    def calc_h_delta(self, parent_state, new_state, an_action):
+        """Update the parent's red count from the touched tiles only"""
+        mask = self.masks[an_action]
+        # tiles in the mask that are red now were green before, and the rest were red
+        reds = round(parent_state.hval * 5) + 2*(new_state.bits & mask).bit_count() - mask.bit_count()
+        return reds / 5
+
+    def calc_h_batch(self, children):
+        """The red count of every grid in the batch, divided by 5"""
+        if np is not None and isinstance(children, np.ndarray):
+            return popcounts(children) / 5
+        return [[bits.bit_count() / 5 for bits in row] for row in children]
+
+
 # end of file
 
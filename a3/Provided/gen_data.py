@@ -1,6 +1,30 @@
 import sys as sys
 import random as rand
+import collections as collections
+import concurrent.futures as futures
 import coloredTiles as P
+import AlgebraicSearch as Algebra
+import puzzlefile
+
+# usage: python gen_data.py num_samples gridsize solution_depth [--workers N] [--packed FILE] [--seed S]
+#                                                               [--distinct] [--symmetric] [--uniform]
+#   Each sample is made by touching solution_depth tiles of an all-green grid, chosen at random
+#   (a tile may be chosen more than once).  With solution_depth 0, every sample is all green.
+#   The optimal depth of each sample (which may be less than solution_depth) is found exactly
+#   by AlgebraicSearch.
+#   With --packed FILE, the samples are written to FILE in the packed binary format, with their
+#   optimal depths (see puzzlefile); otherwise they are printed in the text format.
+#   With --workers N, the samples are made and solved by N worker processes.
+#   With --distinct, the samples are all different, and the all-green grid is never a sample.
+#   With --symmetric (which implies --distinct), rotations and reflections of a sample count as
+#   the same sample.
+#   With --uniform, each tile is touched with probability 1/2 instead, and solution_depth is ignored.
+#   This makes every grid that can be solved equally likely, and gives a wide range of optimal depths.
+#   A count of the samples at each optimal depth is printed to stderr at the end.
+
+# the number of grids a worker makes or solves per job
+chunk_size = 10000
+
 
 def state_string(s):
     answer = ""
@@ -13,28 +37,141 @@ def state_string(s):
             else:
                 answer += "R"
         answer += "\n"
-        
+
     return answer
-        
-if len(sys.argv) < 4:
-    print('usage: python', sys.argv[0], 'num_samples gridsize solution_depth')
-    sys.exit()
-        
-num_samples = int(sys.argv[1])
-dims = int(sys.argv[2])
-depth = int(sys.argv[3])
-
-start = []
-for r in range(dims):
-    row = []
-    for c in range(dims):
-        row.append(True)
-    start.append(row)
-
-for samp in range(num_samples):        
-    s = P.State(start)
-    for d in range(depth):
-        x = rand.randint(0, dims-1)
-        y = rand.randint(0, dims-1)
-        s.touch(x, y)
-    print(state_string(s), end="")
\ No newline at end of file
+
+
+def make_grids(dims, depth, count, seed, uniform):
+    """Make count random grids, packed (see coloredTiles.BitState), so a touch is one XOR.
+       :return: a list of the packed grids
+    """
+    rng = rand.Random(seed)
+    masks = P.touch_masks(dims, dims)
+    grids = []
+    for i in range(count):
+        bits = 0
+        if uniform:
+            touched = rng.getrandbits(dims*dims)
+            while touched:
+                low = touched & -touched
+                bits ^= masks[low.bit_length() - 1]
+                touched ^= low
+        else:
+            for d in range(depth):
+                x = rng.randint(0, dims-1)
+                y = rng.randint(0, dims-1)
+                bits ^= masks[x*dims + y]
+        grids.append(bits)
+    return grids
+
+
+def solve_grids(dims, grids):
+    """Find the optimal depth of each packed grid, with AlgebraicSearch.
+       :return: a list of the optimal depths, in the same order as the grids
+    """
+    system = Algebra.toggle_system(dims, dims)
+    return [system.solve(bits)[0].bit_count() for bits in grids]
+
+
+def generate(num_samples, dims, depth, workers=1, distinct=False, symmetric=False, uniform=False, seed=None):
+    """Make num_samples samples, using the given number of worker processes.
+       The grids are made first, and duplicates are dropped before any grid is solved,
+       so no time is spent solving a grid that is not kept.
+       With distinct, fewer are returned if there are not that many distinct grids to be found.
+       :return: a list of (bits, optimal depth)
+    """
+    if seed is None:
+        seed = rand.randrange(1 << 32)
+    distinct = distinct or symmetric
+    pool = futures.ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    run = pool.map if pool is not None else map
+    try:
+        # make the grids, a round of jobs at a time; the results come back in order,
+        # so the same seed gives the same samples, whatever the number of workers
+        grids = []
+        seen = set()
+        jobs = 0
+        stale = 0
+        while len(grids) < num_samples and stale < 3:
+            counts = []
+            needed = num_samples - len(grids)
+            while needed > 0 and len(counts) < max(workers, 1):
+                counts.append(min(chunk_size, needed))
+                needed -= counts[-1]
+            seeds = ['{}-{}'.format(seed, jobs + i + 1) for i in range(len(counts))]
+            jobs += len(counts)
+            added = 0
+            for chunk in run(make_grids, [dims]*len(counts), [depth]*len(counts), counts, seeds,
+                             [uniform]*len(counts)):
+                for bits in chunk:
+                    if len(grids) == num_samples:
+                        break
+                    if distinct:
+                        key = P.canonical_key(bits, dims) if symmetric else bits
+                        if bits == 0 or key in seen:
+                            continue
+                        seen.add(key)
+                    grids.append(bits)
+                    added += 1
+            # a run of rounds with nothing new means the distinct grids have run out
+            stale = 0 if added > 0 else stale + 1
+
+        # then solve only the grids that were kept
+        chunks = [grids[i:i + chunk_size] for i in range(0, len(grids), chunk_size)]
+        optimal = []
+        for depths in run(solve_grids, [dims]*len(chunks), chunks):
+            optimal.extend(depths)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return list(zip(grids, optimal))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    workers = 1
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i+1])
+        del args[i:i+2]
+    packed = None
+    if '--packed' in args:
+        i = args.index('--packed')
+        packed = args[i+1]
+        del args[i:i+2]
+    seed = None
+    if '--seed' in args:
+        i = args.index('--seed')
+        seed = int(args[i+1])
+        del args[i:i+2]
+    flags = {}
+    for flag in ('--distinct', '--symmetric', '--uniform'):
+        flags[flag] = flag in args
+        if flags[flag]:
+            args.remove(flag)
+
+    if len(args) < 3:
+        print('usage: python', sys.argv[0], 'num_samples gridsize solution_depth',
+              '[--workers N] [--packed FILE] [--seed S] [--distinct] [--symmetric] [--uniform]')
+        sys.exit()
+
+    num_samples = int(args[0])
+    dims = int(args[1])
+    depth = int(args[2])
+
+    samples = generate(num_samples, dims, depth, workers, flags['--distinct'], flags['--symmetric'],
+                       flags['--uniform'], seed)
+    if len(samples) < num_samples:
+        print('only', len(samples), 'distinct samples found', file=sys.stderr)
+
+    if packed is not None:
+        puzzles = ([''.join('G' if tile else 'R' for tile in row) for row in P.unpack_puzzle(bits, dims, dims)]
+                   for bits, optimal in samples)
+        puzzlefile.write_packed(packed, puzzles, [optimal for bits, optimal in samples])
+    else:
+        for bits, optimal in samples:
+            print(state_string(P.State(P.unpack_puzzle(bits, dims, dims))), end="")
+
+    counts = collections.Counter(optimal for bits, optimal in samples)
+    for optimal in sorted(counts):
+        print('depth', optimal, ':', counts[optimal], 'samples', file=sys.stderr)
@@ -1,4 +1,19 @@
 # A totally superfluous module to calculate effective branching factor
+#
+# eff_br_facts(nodes, depths) does a whole list of searches in one call.
+# It uses the closed form of the geometric sum,
+#     b**0 + b**1 + ... + b**d = (b**(d+1) - 1)/(b - 1)
+# and its exact derivative, instead of adding up the powers and estimating the derivative.
+# The equation is solved for log(N+1), so that huge node counts do not overflow,
+# by Newton-Raphson, falling back to bisection whenever a step leaves the bracket
+# where the root must be.  NumPy does all the searches at once, if it is installed.
+
+import math as math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 def deriv(f, h):
     """Given a function f:R->R of one parameter, return a function that approximates the derivative.
@@ -40,3 +55,114 @@ def eff_br_fact(nodes, depth):
     else:  
         return newton_raphson(total_nodes(nodes,depth), nodes**(1/depth), 0.0001)
 
+
+# steps smaller than this, relative to b, end the search
+_TOLERANCE = 1e-12
+_MAX_STEPS = 200
+# closer than this to b = 1, the closed form divides 0 by 0, so a series is used
+_NEAR_ONE = 1e-4
+
+
+def _log_sum(b, d):
+    """Return (log S, S'/S) where S = b**0 + b**1 + ... + b**d, for b >= 0 and d >= 1."""
+    e = b - 1
+    if abs(e) < _NEAR_ONE:
+        # the Taylor series of S about b = 1
+        c2 = d*(d+1)/2
+        c3 = c2*(d-1)/3
+        S = (d+1) + e*(c2 + e*c3)
+        return math.log(S), (c2 + 2*e*c3)/S
+    elif b > 1:
+        x = (d+1)*math.log(b)
+        # S = b**(d+1) (1 - b**-(d+1)) / (b - 1)
+        rest = -math.expm1(-x)
+        return x + math.log(rest) - math.log(e), (d+1)/(b*rest) - 1/e
+    elif b > 0:
+        p = b**(d+1)
+        return math.log1p(-p) - math.log1p(-b), 1/(1-b) - (d+1)*p/(b*(1-p))
+    else:
+        return 0.0, 1.0
+
+
+def _eff_br_fact(nodes, depth):
+    """Solve b**0 + b**1 + ... + b**depth = nodes + 1 for b, as explained above."""
+    if depth == 0 or nodes <= 0:
+        return 0
+    if depth == 1:
+        return nodes
+    target = math.log(nodes + 1)
+    # S(b) >= b**depth, so the root is no larger than (N+1)**(1/d)
+    lo, hi = 0.0, math.exp(target/depth)
+    b = hi
+    for _ in range(_MAX_STEPS):
+        log_s, slope = _log_sum(b, depth)
+        g = log_s - target
+        if g > 0:
+            hi = b
+        elif g < 0:
+            lo = b
+        else:
+            return b
+        new_b = b - g/slope
+        if not lo < new_b < hi:
+            new_b = (lo + hi)/2
+        if abs(new_b - b) <= _TOLERANCE*b:
+            return new_b
+        b = new_b
+    return b
+
+
+def _eff_br_facts_numpy(nodes, depths):
+    """eff_br_facts(), with every search solved at once by NumPy."""
+    N = np.asarray(nodes, dtype=float)
+    d = np.asarray(depths, dtype=float)
+    result = np.where(d == 1, N, 0.0)
+    todo = (d > 1) & (N > 0)
+    if not todo.any():
+        return result
+    N = N[todo]
+    d = d[todo]
+    target = np.log1p(N)
+    lo = np.zeros_like(N)
+    hi = np.exp(target/d)
+    b = hi.copy()
+    c2 = d*(d+1)/2
+    c3 = c2*(d-1)/3
+    with np.errstate(all='ignore'):
+        for _ in range(_MAX_STEPS):
+            e = b - 1
+            # the three cases of _log_sum(), computed everywhere and then chosen
+            x = (d+1)*np.log(b)
+            rest = -np.expm1(-x)
+            log_big = x + np.log(rest) - np.log(e)
+            slope_big = (d+1)/(b*rest) - 1/e
+            p = b**(d+1)
+            log_small = np.log1p(-p) - np.log1p(-b)
+            slope_small = 1/(1-b) - (d+1)*p/(b*(1-p))
+            S = (d+1) + e*(c2 + e*c3)
+            near = np.abs(e) < _NEAR_ONE
+            log_s = np.where(near, np.log(S), np.where(b > 1, log_big, np.where(b > 0, log_small, 0.0)))
+            slope = np.where(near, (c2 + 2*e*c3)/S, np.where(b > 1, slope_big, np.where(b > 0, slope_small, 1.0)))
+            g = log_s - target
+            hi = np.where(g > 0, b, hi)
+            lo = np.where(g < 0, b, lo)
+            new_b = b - g/slope
+            new_b = np.where((new_b > lo) & (new_b < hi), new_b, (lo + hi)/2)
+            new_b = np.where(g == 0, b, new_b)
+            done = np.abs(new_b - b) <= _TOLERANCE*b
+            b = new_b
+            if done.all():
+                break
+    result[todo] = b
+    return result
+
+
+def eff_br_facts(nodes, depths):
+    """Calculate the effective branching factors of many searches at once.
+       :param nodes: a sequence of the numbers of nodes expanded
+       :param depths: a sequence of the depths the solutions were found at
+       :return: the effective branching factors, a NumPy array if NumPy is installed, or else a list
+    """
+    if np is not None:
+        return _eff_br_facts_numpy(nodes, depths)
+    return [_eff_br_fact(n, d) for n, d in zip(nodes, depths)]
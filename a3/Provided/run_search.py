@@ -11,131 +11,457 @@
 
 # This implementation is provided on an as-is basis, suitable for educational purposes only.
 #
+# usage: python run_search.py examplefile timelimit [--workers N] [--stats] [--cache FILE]
+#   With --workers N, the (strategy, example) jobs are solved by N worker processes.
+#   Each search stops itself at the time limit.  A job that runs past the time limit
+#   (plus a second's grace) anyway is stopped by the main process, which terminates its worker
+#   and starts a new one; the other jobs running at the time carry on undisturbed.
+#   With --stats, the searches count and time their parts (goal tests, result(), calc_h(),
+#   the frontier), and the totals are printed with each summary.
+#   With --cache FILE, results are kept in FILE (see solutioncache.py), and an example
+#   already solved by a strategy is not searched again.
 
 
 import UninformedSearch as BlindSearch
 import InformedSearch as Search
+import AlgebraicSearch as Algebraic
 import coloredTiles as P
 import roots as roots
+import puzzlefile
+import solutioncache
 import Statistics
 
+import collections as collections
 import gc as gc
+import multiprocessing as multiprocessing
+import multiprocessing.connection
 import sys as sys
 import time as time
 
-# process the command line arguments
-print(sys.argv)
 
-if len(sys.argv) < 3:
-    print('usage: python', sys.argv[0], 'examplefile timelimit')
-    sys.exit()
+strategies = ['AStar0', 'AStarH1', 'AStarH2']
+# also available: 'IDAStar0', 'IDAStarH1', 'IDAStarH2' (IDA* with the same heuristics)
+#                 'AStarPDB' (A* with pattern databases; see PatternDatabase.py)
+#                 'AStarReds' (A* counting red tiles, updated incrementally on bitboards)
+#                 'AStarBatch' (A* counting red tiles, expanding a batch of bitboards at a time; faster with NumPy)
+#                 'ARAStar' (anytime repairing A* counting red tiles; a first solution quickly, then better ones)
+#                 'SMAStar' (A* counting red tiles, with a bounded number of nodes in memory)
+#                 'Beam' (beam search counting red tiles; always answers, but not always a solution)
+#                 'GF2' (exact solver using linear algebra; see AlgebraicSearch.py)
 
-file = open(sys.argv[1], 'r')
-timelimit = int(sys.argv[2])
+# the most nodes in memory for 'SMAStar'
+sma_nodes = 100000
 
+# nodes kept in each layer by 'Beam'
+beam_width = 100
 
+# the first weight for 'ARAStar', and how much it is lowered after each solution
+ara_weight = 3.0
+ara_step = 0.5
+
+# seconds a job may run past the time limit before the main process stops it
+grace = 1
+
+
+def solve(solver, ex, timelimit, instrument=False):
+    """Solve one example with one strategy.
+       :param instrument: if True, the search counts and times its parts (see UninformedSearch.SearchStats)
+       :return: a tuple (problem, answer), where answer is a SearchTerminationRecord
+    """
+    if solver == 'AStar0':
+        problem = P.InformedProblem(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.AStarSearch(s)
+
+    elif solver == 'AStarH1':
+        problem = P.InformedProblemV1(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.AStarSearch(s)
+
+    elif solver == 'AStarH2':
+        problem = P.InformedProblemV2(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.AStarSearch(s)
+
+    elif solver == 'AStarPDB':
+        problem = P.InformedProblemPDB(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.AStarSearch(s)
+
+    elif solver == 'AStarReds':
+        problem = P.InformedBitProblemReds(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.AStarSearch(s)
+
+    elif solver == 'AStarBatch':
+        problem = P.InformedBitProblemReds(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit)
+        answer = searcher.BatchAStarSearch(s)
+
+    elif solver == 'IDAStar0':
+        problem = P.InformedProblem(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.IDAStarSearch(s)
+
+    elif solver == 'IDAStarH1':
+        problem = P.InformedProblemV1(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.IDAStarSearch(s)
+
+    elif solver == 'IDAStarH2':
+        problem = P.InformedProblemV2(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.IDAStarSearch(s)
+
+    elif solver == 'ARAStar':
+        problem = P.InformedBitProblemReds(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.ARAStarSearch(s, ara_weight, ara_step)
+
+    elif solver == 'SMAStar':
+        problem = P.InformedBitProblemReds(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.SMAStarSearch(s, sma_nodes)
+
+    elif solver == 'Beam':
+        problem = P.InformedBitProblemReds(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Search.InformedSearch(problem, timelimit=timelimit, instrument=instrument)
+        answer = searcher.BeamSearch(s, beam_width)
+
+    elif solver == 'GF2':
+        problem = P.BitProblem(len(ex), len(ex[0]), ex)
+        s = problem.create_initial_state()
+        searcher = Algebraic.AlgebraicSearch(problem, timelimit=timelimit)
+        answer = searcher.GaussianElimination(s)
+
+    else:
+        print('Unknown solver:', solver, '-- terminating!')
+        sys.exit(1)
+
+    return problem, answer
+
+
+def run_job(solver, ex, timelimit, instrument=False):
+    """Solve one example with one strategy, and summarize the answer.
+       The summary is small, so it is cheap to send back from a worker process.
+       :param instrument: if True, the search counts and times its parts
+       :return: a tuple (solver, success, depth, time, nodes, space, stats, actions); depth and actions
+                are None if unsolved, and stats is None unless the search was instrumented
+    """
+    gc.collect()  # clean up any allocated memory now, before we start timing stuff
+
+    problem, answer = solve(solver, ex, timelimit, instrument)
+
+    # process the result of search
+    if answer.success:
+        # a weak check: if the specified goal state is equal to the returned goal state
+        # could be stronger if the sequence of actions were checked
+        checked = (answer.result.state.puzzle == problem.goal_state.puzzle)
+
+        # print the actions
+        # answer.result.display_steps()
+
+        # display the details about this example
+#         print(ex[0], ':', ex[1], ex[2], answer.result.depth, answer.success, checked,
+#               answer.time, answer.nodes, answer.space)
+        depth = answer.result.depth
+        actions = solutioncache.actions_of(answer.result)
+    else:
+#         print(ex[0], ':', ex[1], ex[2], None, answer.success, None, answer.time, answer.nodes, answer.space, '*****')
+        depth = None
+        actions = None
+
+    return (solver, answer.success, depth, answer.time, answer.nodes, answer.space, answer.stats, actions)
+
+
+def stopped_result(solver, hard_limit):
+    """Return the result of a job that was stopped after hard_limit seconds, as a tuple like run_job() returns"""
+    return (solver, False, None, hard_limit, 0, 0, None, None)
+
+
+def run_worker(function, conn):
+    """The loop of a worker process: call function on each job received on conn,
+       and send back (result, error), until None is received"""
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        try:
+            answer = (function(*job), None)
+        except Exception as error:
+            answer = (None, error)
+        conn.send(answer)
 
-strategies = ['AStar0', 'AStarH1', 'AStarH2']
 
-# read the examples first
-examples = []
-file = open(sys.argv[1], 'r')
-line = file.readline()
-
-while line:
-    #read the puzzle dimension
-    dims = int(line)
-    # create a list of strings for the puzzle
-    puzzle = []
-    for i in range(dims):
-        line = file.readline().rstrip()
-        puzzle.append(line)
-    examples.append(puzzle)
-    line = file.readline()
-
-predicted_time = len(strategies)*timelimit*len(examples)
-print('Estimate for the time to solve', sys.argv[1], 'using strategies:', strategies, 'is', predicted_time, 'seconds')
-global_start = time.time()
-
-# try all the solvers
-for solver in strategies:
-    max_time = -1
-    max_depth = -1
-    count_unsolved = 0
-    total_time = 0
-    depth_stat = Statistics.Statistics()
-    time_stat = Statistics.Statistics()
-    ebf_stat = Statistics.Statistics()
-    nodes_stat = Statistics.Statistics()
-    space_stat = Statistics.Statistics()
-
-#     print('Details for',solver,'on data set',sys.argv[1])
-#     
-#     print('index :', 'target', 'size', 'depth', 'success', 'checked', 'time', 'nodes', 'space')
-
-    for ex in examples:
-        gc.collect()  # clean up any allocated memory now, before we start timing stuff
-
-
-        if solver == 'AStar0':
-            problem = P.InformedProblem(len(ex), len(ex[0]), ex)
-            s = problem.create_initial_state()
-            searcher = Search.InformedSearch(problem, timelimit=timelimit)
-            answer = searcher.AStarSearch(s)
-
-        elif solver == 'AStarH1':
-            problem = P.InformedProblemV1(len(ex), len(ex[0]), ex)
-            s = problem.create_initial_state()
-            searcher = Search.InformedSearch(problem, timelimit=timelimit)
-            answer = searcher.AStarSearch(s)
-
-        elif solver == 'AStarH2':
-            problem = P.InformedProblemV2(len(ex), len(ex[0]), ex)
-            s = problem.create_initial_state()
-            searcher = Search.InformedSearch(problem, timelimit=timelimit)
-            answer = searcher.AStarSearch(s)
-
-        else:
-            print('Unknown solver:', solver, '-- terminating!')
-            sys.exit(1)
-
-        # process the result of search
-        if answer.success:
-            # a weak check: if the specified goal state is equal to the returned goal state
-            # could be stronger if the sequence of actions were checked
-            checked = (answer.result.state.puzzle == problem.goal_state.puzzle)
-
-            # print the actions
-            # answer.result.display_steps()
-
-            # display the details about this example
-#             print(ex[0], ':', ex[1], ex[2], answer.result.depth, answer.success, checked,
-#                   answer.time, answer.nodes, answer.space)
-
-            ebf_stat.add(roots.eff_br_fact(answer.nodes, answer.result.depth))
-            depth_stat.add(answer.result.depth)
-        else:
-            count_unsolved += 1
-#             print(ex[0], ':', ex[1], ex[2], None, answer.success, None, answer.time, answer.nodes, answer.space, '*****')
-
-        time_stat.add(answer.time)
-        nodes_stat.add(answer.nodes/answer.time)
-        space_stat.add(answer.space)
-
-    # print a summary of all the examples
+def run_parallel(function, jobs, workers, hard_limit):
+    """Run jobs in worker processes, and yield (job, result) for each, as they finish.
+       Each worker has its own pipe, so a job that runs past its deadline is stopped by
+       terminating its worker alone; the other running jobs are not disturbed, and a new
+       worker takes the place of the stopped one.
+       :param function: the function to call in the workers
+       :param jobs: a list of tuples of arguments for function
+       :param hard_limit: the seconds a job may run before it is stopped
+       :return: a generator of (job, result); result is None for a job that was stopped
+    """
+    # a job is only sent when a worker is free, so its time starts when it is sent
+    waiting = collections.deque(jobs)
+    idle = []     # (process, conn) of the workers with nothing to do
+    running = {}  # conn: (process, job, deadline)
+    try:
+        while waiting or running:
+            while waiting and len(running) < workers:
+                if idle:
+                    process, conn = idle.pop()
+                else:
+                    conn, child_conn = multiprocessing.Pipe()
+                    process = multiprocessing.Process(target=run_worker, args=(function, child_conn), daemon=True)
+                    process.start()
+                    child_conn.close()
+                job = waiting.popleft()
+                conn.send(job)
+                running[conn] = (process, job, time.time() + hard_limit)
+            deadline = min(d for _, _, d in running.values())
+            for conn in multiprocessing.connection.wait(list(running), max(deadline - time.time(), 0)):
+                process, job, _ = running.pop(conn)
+                try:
+                    result, error = conn.recv()
+                except EOFError:
+                    raise RuntimeError('a worker process died while running {}'.format(job))
+                idle.append((process, conn))
+                if error is not None:
+                    raise error
+                yield job, result
+            # past a deadline: stop only the workers whose jobs are overdue
+            now = time.time()
+            for conn, (process, job, d) in list(running.items()):
+                if d <= now:
+                    del running[conn]
+                    process.terminate()
+                    process.join()
+                    conn.close()
+                    yield job, None
+    finally:
+        for process, conn in idle:
+            conn.send(None)
+        for process, conn in idle + [(process, conn) for conn, (process, _, _) in running.items()]:
+            process.terminate()
+            process.join()
+            conn.close()
+
+
+def cached_result(cache, solver, ex, timelimit):
+    """Return the result of a cached search, as a tuple like run_job() returns; or None if there is none"""
+    entry = cache.lookup(ex, solver, timelimit)
+    if entry is None:
+        return None
+    return (solver, entry.success, entry.depth, entry.time, entry.nodes, entry.space, None, entry.actions)
+
+
+def store_result(cache, ex, timelimit, result):
+    """Store a tuple returned by run_job() in the cache"""
+    solver, success, depth, runtime, nodes, space, stats, actions = result
+    cache.store(ex, solver, timelimit, success, actions, runtime, nodes, space)
+
+
+class Summary(object):
+    """The statistics of the results of one strategy, kept without storing the results.
+       Summaries of different sets of results can be merged, so each worker process can
+       summarize its own results, and the main process only merges them.
+    """
+
+    def __init__(self):
+        self.attempted = 0
+        self.unsolved = 0
+        self.depth_stat = Statistics.Statistics()
+        self.time_stat = Statistics.Statistics()
+        self.ebf_stat = Statistics.Statistics()
+        self.nodes_stat = Statistics.Statistics()
+        self.expanded_stat = Statistics.Statistics()
+        self.space_stat = Statistics.Statistics()
+        self.search_stats = None    # SearchStats: the totals of the instrumented searches, if any
+
+    def add_all(self, results):
+        """Add a list of tuples, as returned by run_job()"""
+        # the effective branching factors are solved for all at once, after the loop
+        solved_nodes = []
+        solved_depths = []
+        for _, success, depth, runtime, nodes, space, stats, _ in results:
+            if stats is not None:
+                if self.search_stats is None:
+                    self.search_stats = BlindSearch.SearchStats()
+                self.search_stats.add(stats)
+            if success:
+                solved_nodes.append(nodes)
+                solved_depths.append(depth)
+                self.depth_stat.add(depth)
+            else:
+                self.unsolved += 1
+
+            self.attempted += 1
+            self.time_stat.add(runtime)
+            self.nodes_stat.add(nodes/runtime)
+            self.expanded_stat.add(nodes)
+            self.space_stat.add(space)
+
+        for ebf in roots.eff_br_facts(solved_nodes, solved_depths):
+            self.ebf_stat.add(ebf)
+
+    def merge(self, other):
+        """Add the results summarized by another Summary"""
+        self.attempted += other.attempted
+        self.unsolved += other.unsolved
+        self.depth_stat.merge(other.depth_stat)
+        self.time_stat.merge(other.time_stat)
+        self.ebf_stat.merge(other.ebf_stat)
+        self.nodes_stat.merge(other.nodes_stat)
+        self.expanded_stat.merge(other.expanded_stat)
+        self.space_stat.merge(other.space_stat)
+        if other.search_stats is not None:
+            if self.search_stats is None:
+                self.search_stats = BlindSearch.SearchStats()
+            self.search_stats.add(other.search_stats)
+
+
+def summarize(results):
+    """Return a Summary of a list of tuples, as returned by run_job()"""
+    summary = Summary()
+    summary.add_all(results)
+    return summary
+
+
+def run_summarized_job(*job):
+    """Run a job in a worker process, as run_job() does.
+       :return: a tuple (result, summary), where summary is the Summary of the one result
+    """
+    result = run_job(*job)
+    return result, summarize([result])
+
+
+def print_summary(solver, filename, summary):
+    """Print a summary of all the examples solved by one strategy.
+       :param summary: a Summary of the results
+    """
     print()
-    print('Summary for',solver,'on data set',sys.argv[1])
-    print("Attempted:", len(examples))
-    print("Solved:", len(examples) - count_unsolved)
-    print("Average depth:", depth_stat.mean())
-    print("Average time:", time_stat.mean())
-    print("Average space:", space_stat.mean())
-    #print("Average effective branching factor:", ebf_stat.mean())
-    #print("Average nodes per second:", nodes_stat.mean())
-    #print("Maximum time:", time_stat.max())
-    #print("Maximum depth:", depth_stat.max())
+    print('Summary for',solver,'on data set',filename)
+    print("Attempted:", summary.attempted)
+    print("Solved:", summary.attempted - summary.unsolved)
+    print("Average depth:", summary.depth_stat.mean())
+    print("Average time:", summary.time_stat.mean())
+    print("Average space:", summary.space_stat.mean())
+    print_quantiles("Time", summary.time_stat)
+    print_quantiles("Nodes", summary.expanded_stat)
+    print("Average effective branching factor:", summary.ebf_stat.mean())
+    #print("Average nodes per second:", summary.nodes_stat.mean())
+    #print("Maximum time:", summary.time_stat.max())
+    #print("Maximum depth:", summary.depth_stat.max())
     #print("Time cutoff:", timelimit)
-    #print("Total time:", time_stat.mean()*time_stat.count())
+    #print("Total time:", summary.time_stat.mean()*summary.time_stat.count())
+    if summary.search_stats is not None:
+        print("Totals from instrumented searches:")
+        print(summary.search_stats)
     print("\n")
-global_finish = time.time()
-print('Took', global_finish - global_start, 'seconds (predicted', predicted_time, 'seconds)')
\ No newline at end of file
+
+
+def print_quantiles(name, stat):
+    """Print the median, 95th and 99th percentiles of the values in a Statistics object"""
+    if stat.count() > 0:
+        print(name, "p50/p95/p99:", stat.quantile(0.5), stat.quantile(0.95), stat.quantile(0.99))
+
+
+if __name__ == '__main__':
+    # process the command line arguments
+    print(sys.argv)
+
+    args = sys.argv[1:]
+    workers = 1
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i+1])
+        del args[i:i+2]
+    instrument = '--stats' in args
+    if instrument:
+        args.remove('--stats')
+    cache = None
+    if '--cache' in args:
+        i = args.index('--cache')
+        cache = solutioncache.SolutionCache(args[i+1])
+        del args[i:i+2]
+
+    if len(args) < 2:
+        print('usage: python', sys.argv[0], 'examplefile timelimit [--workers N] [--stats] [--cache FILE]')
+        sys.exit()
+
+    filename = args[0]
+    timelimit = int(args[1])
+
+    # read the examples first
+    examples = list(puzzlefile.read_puzzles(filename))
+
+    predicted_time = len(strategies)*timelimit*len(examples)/workers
+    print('Estimate for the time to solve', filename, 'using strategies:', strategies, 'is', predicted_time, 'seconds')
+    global_start = time.time()
+    # the summary over every strategy, merged from the summaries of each
+    overall = Summary()
+
+    if workers <= 1:
+        # try all the solvers, one at a time
+        for solver in strategies:
+            results = []
+            for ex in examples:
+                result = cached_result(cache, solver, ex, timelimit) if cache is not None else None
+                if result is None:
+                    result = run_job(solver, ex, timelimit, instrument=instrument)
+                    if cache is not None:
+                        store_result(cache, ex, timelimit, result)
+                results.append(result)
+            summary = summarize(results)
+            print_summary(solver, filename, summary)
+            overall.merge(summary)
+    else:
+        # send every (strategy, example) job that is not cached to the pool; each worker
+        # summarizes its own results, and the summaries are merged here, by strategy
+        summaries = {solver: Summary() for solver in strategies}
+        jobs = []
+        for solver in strategies:
+            cached = []
+            for ex in examples:
+                result = cached_result(cache, solver, ex, timelimit) if cache is not None else None
+                if result is None:
+                    jobs.append((solver, ex, timelimit, instrument))
+                else:
+                    cached.append(result)
+            summaries[solver].add_all(cached)
+        for job, output in run_parallel(run_summarized_job, jobs, workers, timelimit + grace):
+            solver, ex = job[0], job[1]
+            if output is None:
+                result = stopped_result(solver, timelimit + grace)
+                summary = summarize([result])
+            else:
+                result, summary = output
+            if cache is not None:
+                store_result(cache, ex, timelimit, result)
+            summaries[solver].merge(summary)
+        for solver in strategies:
+            print_summary(solver, filename, summaries[solver])
+            overall.merge(summaries[solver])
+
+    if cache is not None:
+        cache.close()
+
+    print('Over all strategies:')
+    print_quantiles("Time", overall.time_stat)
+    print_quantiles("Nodes", overall.expanded_stat)
+    global_finish = time.time()
+    print('Took', global_finish - global_start, 'seconds (predicted', predicted_time, 'seconds)')
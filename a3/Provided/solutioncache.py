@@ -0,0 +1,127 @@
+# CMPT 317: An on-disk cache of solved Colored Tile problems
+
+# The cache is an SQLite database file.  Each entry is keyed by the canonical form of
+# the board, and the name of the strategy that solved it, and stores the solution
+# (the list of tiles touched), its depth, and the time, nodes and space of the search.
+#
+# Rotating or reflecting a board does not change how hard it is to solve: touching the
+# rotated tiles solves the rotated board.  So boards are stored in a canonical form,
+# the smallest of their rotations and reflections (see coloredTiles), and the actions are turned back
+# to fit the board that was asked about.  Only transforms that keep the shape of the
+# board are used, so a board that is not square has 4 forms instead of 8.
+#
+# A search that fails is only a failure within its time limit, so failures are stored
+# with the time limit, and only reused for a time limit that is no longer.
+#
+# Usage:
+#   import solutioncache as sc
+#   with sc.SolutionCache(filename) as cache:
+#       entry = cache.lookup(puzzle, 'IDS', timelimit)    # puzzle is a list of strings of G and R
+#       if entry is None:
+#           ... search ...
+#           cache.store(puzzle, 'IDS', timelimit, answer.success, sc.actions_of(answer.result),
+#                       answer.time, answer.nodes, answer.space)
+#       else:
+#           print(entry.depth, entry.actions)
+
+import json as json
+import sqlite3 as sqlite3
+import coloredTiles as P
+
+
+def canonical_form(puzzle):
+    """ Return (key, t): the canonical key of the puzzle (a list of strings of G and R), a string,
+        and the transform t that turns the puzzle into the canonical one (see coloredTiles).
+    """
+    nrows, ncols = len(puzzle), len(puzzle[0])
+    bits = P.pack_puzzle([[tile == 'G' for tile in row] for row in puzzle])
+    key, t = P.canonical_form(bits, nrows, ncols)
+    return '{}x{}:{}'.format(nrows, ncols, key), t
+
+
+def actions_of(node):
+    """ Return the list of actions on the path from the initial state to the given SearchNode """
+    actions = []
+    while node is not None and node.parent is not None:
+        actions.append(node.state.action)
+        node = node.parent
+    actions.reverse()
+    return actions
+
+
+class CachedSolution(object):
+    """An entry from the cache, with the same details as a SearchTerminationRecord."""
+
+    def __init__(self, success, actions, time, nodes, space):
+        self.success = success  # Boolean: True if a solution was found
+        self.actions = actions  # list of (row, col): the tiles to touch, or None if no solution found
+        self.depth = len(actions) if actions is not None else None
+        self.time = time        # float: the time of the search that found it
+        self.nodes = nodes      # integer: number of nodes expanded by that search
+        self.space = space      # integer: maximum size of the frontier during that search
+
+    def display_steps(self):
+        """Display the actions, in the same way as SearchNode.display_steps()"""
+        print("Solution:")
+        for action in self.actions:
+            print(str(action))
+
+
+class SolutionCache(object):
+    """An on-disk cache of solutions, keyed by canonical board and strategy name."""
+
+    def __init__(self, filename):
+        """Open the cache file, creating it if needed"""
+        self._db = sqlite3.connect(filename)
+        self._db.execute('CREATE TABLE IF NOT EXISTS solutions ('
+                         ' board TEXT NOT NULL, strategy TEXT NOT NULL,'
+                         ' timelimit REAL, success INTEGER NOT NULL, actions TEXT,'
+                         ' time REAL, nodes INTEGER, space INTEGER,'
+                         ' PRIMARY KEY (board, strategy))')
+        self._db.commit()
+
+    def lookup(self, puzzle, strategy, timelimit=None):
+        """Return the CachedSolution for the puzzle and strategy, or None if there is none.
+           A failure is only returned if it was given at least timelimit seconds.
+        """
+        key, t = canonical_form(puzzle)
+        row = self._db.execute('SELECT timelimit, success, actions, time, nodes, space FROM solutions'
+                               ' WHERE board = ? AND strategy = ?', (key, strategy)).fetchone()
+        if row is None:
+            return None
+        limit, success, actions, time, nodes, space = row
+        if not success:
+            if timelimit is not None and (limit is None or limit < timelimit):
+                return None
+            return CachedSolution(False, None, time, nodes, space)
+        # the stored actions fit the canonical board, which has the same shape; turn them back to fit this one
+        nrows, ncols = len(puzzle), len(puzzle[0])
+        back = P.INVERSE_TRANSFORM[t]
+        actions = [P.transform_cell(r, c, back, nrows, ncols) for r, c in json.loads(actions)]
+        return CachedSolution(True, actions, time, nodes, space)
+
+    def store(self, puzzle, strategy, timelimit, success, actions, time, nodes, space):
+        """Store the outcome of a search for the puzzle with the strategy.
+           :param actions: the list of (row, col) tiles touched; ignored if success is False
+        """
+        key, t = canonical_form(puzzle)
+        if success:
+            nrows, ncols = len(puzzle), len(puzzle[0])
+            actions = json.dumps([P.transform_cell(r, c, t, nrows, ncols) for r, c in actions])
+        else:
+            actions = None
+        self._db.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         (key, strategy, timelimit, int(bool(success)), actions, time, nodes, space))
+        self._db.commit()
+
+    def close(self):
+        """Close the database file"""
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# end of file
@@ -6,6 +6,7 @@ import sys
 import time
 import coloredTiles as problem
 import localsearch as search
+import puzzlefile
 
 
 # process the command line
@@ -14,19 +15,12 @@ if len(sys.argv) != 2:
     sys.exit()
 
 
-file = open(sys.argv[1], 'r')
-line = file.readline()
 puzzles = []
 N = 0
-while line:
+for puzzle in puzzlefile.read_puzzles(sys.argv[1]):
     #read the puzzle dimension
-    dims = int(line)
+    dims = len(puzzle)
     N = dims
-    puzzle = []
-    for i in range(dims):
-        line = file.readline().rstrip()
-        puzzle.append(line)
-    line = file.readline()
     p = problem.Problem(dims, dims, puzzle)
     puzzles.append(p)
     
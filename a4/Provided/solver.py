@@ -8,6 +8,7 @@ import sys
 import time
 import coloredTiles as problem
 import localsearch as search
+import puzzlefile
 from Statistics import Statistics
 
 
@@ -17,20 +18,12 @@ if len(sys.argv) != 2:
     sys.exit()
 
 filename = sys.argv[1]
-file = open(filename, 'r')
-
-line = file.readline()
 examples = []
 N = 0
-while line:
+for puzzle in puzzlefile.read_puzzles(filename):
     #read the puzzle dimension
-    dims = int(line)
+    dims = len(puzzle)
     N = dims
-    puzzle = []
-    for i in range(dims):
-        line = file.readline().rstrip()
-        puzzle.append(line)
-    line = file.readline()
     p = problem.Problem(dims, dims, puzzle)
     examples.append(p)
     
@@ -129,7 +122,9 @@ def print_plain_text(strats, err_stat_collection, time_stat_collection, stepsran
     for strat in strats:
         for steps in stepsrange:
             # make the data look nice in text
-            print(strat, "Steps", steps, "Score {:.1f}".format(err_stat_collection[strat,steps].mean()), "Time {:.2e}".format(time_stat_collection[strat,steps].mean()))
+            p95 = time_stat_collection[strat,steps].quantile(0.95)
+            print(strat, "Steps", steps, "Score {:.1f}".format(err_stat_collection[strat,steps].mean()), "Time {:.2e}".format(time_stat_collection[strat,steps].mean()),
+                  "p95 {:.2e}".format(p95) if p95 is not None else "p95 n/a")
             
 #print_latex(strats, err_stat_collection, time_stat_collection, stepsrange)
 print_plain_text(strats, err_stat_collection, time_stat_collection, stepsrange)
@@ -8,32 +8,14 @@
 #
 
 import sys as sys
+import puzzlefile
 
 if len(sys.argv) < 1:
     print('usage: python', sys.argv[0], 'problem_file')
     sys.exit()
 
-file = open(sys.argv[1], 'r')
-
-# read the examples first
-examples = []
-file = open(sys.argv[1], 'r')
-line = file.readline()
-
-while line:
-    #read the puzzle dimension
-    dims = int(line)
-    puzzle = []
-    for i in range(dims):
-        line = file.readline().rstrip()
-        puzzle.append(line)
-    examples.append(puzzle)
-    line = file.readline()
-
-file.close()
-
 num = 1
-for p in examples:
+for p in puzzlefile.read_puzzles(sys.argv[1]):
     print("------")
     print("CSP for problem", num)
     #TODO: analyze p to produce appropriate variables, domains and constraitns
@@ -0,0 +1,217 @@
+# CMPT 317: Reading and writing files of Colored Tile problems
+
+# Two file formats are supported.
+#
+# The text format, used by the files in the Data folder:
+#   an integer N by itself on a line, followed by N lines of N characters, each G or R.
+#   This is repeated for each problem instance in the file.
+#
+# A packed binary format, for large generated data sets:
+#   header:  magic b'CTPZ', version (uint16), unused (uint16),
+#            number of instances (uint64), offset of the index (uint64)
+#   records: one per instance: N (uint8), then N rows, each row packed into
+#            (N+7)//8 bytes, little-endian, with bit c set when column c is red
+#   index:   the offset of each record (uint64), in order
+#   All integers are little-endian.  The index makes it possible to jump straight
+#   to any instance without reading the ones before it.
+#   Version 2 is the same, except that each record has the optimal solution depth
+#   of the instance (uint16) between N and the rows, for labeled data sets.
+#
+# In both cases a puzzle is a list of strings of G and R, one string per row,
+# which is what the Problem classes expect.
+#
+# Usage:
+#   import puzzlefile as pf
+#   for puzzle in pf.read_puzzles(filename):     # either format; read one at a time
+#       ...
+#   pf.write_packed(filename, puzzles)           # puzzles can be any iterable
+#   pf.write_packed(filename, puzzles, depths)   # version 2, with the optimal depth of each
+#   with pf.PackedPuzzles(filename) as packed:
+#       puzzle = packed[1000]
+#       depth = packed.depth(1000)               # None for a version 1 file
+
+import array as array
+import mmap as mmap
+import struct as struct
+import sys as sys
+
+MAGIC = b'CTPZ'
+VERSION = 1
+VERSION_DEPTHS = 2
+HEADER = struct.Struct('<4sHHQQ')
+DEPTH = struct.Struct('<H')
+
+
+def _row_bytes(n):
+    """The number of bytes in one packed row of n tiles"""
+    return (n + 7) // 8
+
+
+def pack_row(row):
+    """Pack a string of G and R into bytes; a set bit means a red tile."""
+    bits = 0
+    for c, tile in enumerate(row):
+        if tile == 'R':
+            bits |= 1 << c
+    return bits.to_bytes(_row_bytes(len(row)), 'little')
+
+
+def unpack_row(data, n):
+    """Unpack n tiles from bytes into a string of G and R."""
+    bits = int.from_bytes(data, 'little')
+    return ''.join('R' if bits >> c & 1 else 'G' for c in range(n))
+
+
+def is_packed(filename):
+    """Return True if the file is in the packed binary format."""
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_text(filename):
+    """Read puzzles from a text file, one at a time.
+       :return: a generator of puzzles, each a list of strings
+    """
+    with open(filename, 'r') as file:
+        line = file.readline()
+        while line:
+            if line.strip():
+                #read the puzzle dimension
+                dims = int(line)
+                # create a list of strings for the puzzle
+                puzzle = []
+                for i in range(dims):
+                    puzzle.append(file.readline().rstrip())
+                yield puzzle
+            line = file.readline()
+
+
+def write_text(filename, puzzles):
+    """Write puzzles to a text file.
+       :return: the number of puzzles written
+    """
+    count = 0
+    with open(filename, 'w') as file:
+        for puzzle in puzzles:
+            file.write(str(len(puzzle)) + '\n')
+            for row in puzzle:
+                file.write(row + '\n')
+            count += 1
+    return count
+
+
+def write_packed(filename, puzzles, depths=None):
+    """Write puzzles to a packed binary file.
+       The puzzles are written as they arrive, so puzzles can be a generator.
+       :param depths: optional; the optimal solution depth of each puzzle, in the same order.
+                      If given, the file is version 2.
+       :return: the number of puzzles written
+    """
+    version = VERSION if depths is None else VERSION_DEPTHS
+    if depths is not None:
+        depths = iter(depths)
+    offsets = array.array('Q')
+    with open(filename, 'wb') as file:
+        # the header is written again at the end, when the count and index offset are known
+        file.write(HEADER.pack(MAGIC, version, 0, 0, 0))
+        for puzzle in puzzles:
+            offsets.append(file.tell())
+            file.write(bytes([len(puzzle)]))
+            if depths is not None:
+                file.write(DEPTH.pack(next(depths)))
+            for row in puzzle:
+                file.write(pack_row(row))
+        index = file.tell()
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        file.write(offsets.tobytes())
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, version, 0, len(offsets), index))
+    return len(offsets)
+
+
+class PackedPuzzles(object):
+    """Random access to the puzzles in a packed binary file.
+       The file is memory-mapped, so opening it is cheap no matter how big it is.
+    """
+
+    def __init__(self, filename):
+        """Open the given packed file."""
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, index = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version not in (VERSION, VERSION_DEPTHS):
+            raise ValueError('{} is not a packed puzzle file'.format(filename))
+        self._count = count
+        self._index = index
+        self._has_depths = version == VERSION_DEPTHS
+
+    def __len__(self):
+        """The number of puzzles in the file"""
+        return self._count
+
+    def __getitem__(self, i):
+        """Return puzzle i, as a list of strings"""
+        return self._read(self._offset(i))
+
+    def depth(self, i):
+        """Return the optimal solution depth of puzzle i, or None if the file does not have them"""
+        if not self._has_depths:
+            return None
+        return DEPTH.unpack_from(self._map, self._offset(i) + 1)[0]
+
+    def _offset(self, i):
+        """Return the offset of record i"""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('puzzle index out of range')
+        return struct.unpack_from('<Q', self._map, self._index + 8*i)[0]
+
+    def __iter__(self):
+        """Return the puzzles in order, one at a time"""
+        for i in range(self._count):
+            yield self[i]
+
+    def _read(self, offset):
+        """Return the puzzle stored at the given offset"""
+        n = self._map[offset]
+        width = _row_bytes(n)
+        puzzle = []
+        pos = offset + 1
+        if self._has_depths:
+            pos += DEPTH.size
+        for r in range(n):
+            puzzle.append(unpack_row(self._map[pos:pos + width], n))
+            pos += width
+        return puzzle
+
+    def close(self):
+        """Release the memory map"""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_packed(filename):
+    """Read puzzles from a packed binary file, one at a time.
+       :return: a generator of puzzles, each a list of strings
+    """
+    with PackedPuzzles(filename) as packed:
+        for puzzle in packed:
+            yield puzzle
+
+
+def read_puzzles(filename):
+    """Read puzzles from a file in either format, one at a time.
+       :return: a generator of puzzles, each a list of strings
+    """
+    if is_packed(filename):
+        return read_packed(filename)
+    return read_text(filename)
+
+# end of file